@@ -0,0 +1,233 @@
+"""
+Benchmark Suite for ChemAI Discovery
+Warmed-up, perf_counter_ns-timed benchmarks with percentiles, JSON baselines and regression checks
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import statistics
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+PROJECT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_features import make_library
+
+SIZES = (1, 100, 10000)
+CASES = ("features", "predict_single", "predict_batch", "generate", "serialize")
+TARGET_PROPERTIES = {"solubility": -2.0, "bioavailability": 70.0}
+DEFAULT_BASELINE = os.path.join(PROJECT_ROOT, "benchmarks", "baseline.json")
+
+class Benchmark:
+    """Times one operation: warmup runs, then repeats until a time budget is spent"""
+
+    def __init__(self, warmup: int = 2, min_repeats: int = 5, max_repeats: int = 50, min_time: float = 1.0):
+        self.warmup = warmup
+        self.min_repeats = min_repeats
+        self.max_repeats = max_repeats
+        self.min_time = min_time
+
+    def run(self, func: Callable[[], Any], size: int = 1) -> Dict[str, float]:
+        for _ in range(self.warmup):
+            func()
+
+        samples = []
+        budget_end = time.perf_counter_ns() + int(self.min_time * 1e9)
+        while len(samples) < self.min_repeats or (len(samples) < self.max_repeats and time.perf_counter_ns() < budget_end):
+            start = time.perf_counter_ns()
+            func()
+            samples.append(time.perf_counter_ns() - start)
+        return summarize(samples, size)
+
+def summarize(samples_ns: List[int], size: int = 1) -> Dict[str, float]:
+    """Percentiles, spread and per-molecule throughput of a list of nanosecond timings"""
+    samples = np.asarray(samples_ns, dtype=np.float64) / 1e6  # ms
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    mean = float(samples.mean())
+    stdev = float(statistics.stdev(samples)) if len(samples) > 1 else 0.0
+    return {
+        "size": size,
+        "repeats": len(samples),
+        "mean_ms": mean,
+        "stdev_ms": stdev,
+        "variance_ms2": stdev ** 2,
+        "cv": stdev / mean if mean else 0.0,
+        "min_ms": float(samples.min()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(samples.max()),
+        "per_molecule_us": float(p50) * 1000 / size,
+        "molecules_per_second": size / (float(p50) / 1000) if p50 else 0.0
+    }
+
+class AppTargets:
+    """Binds the benchmark cases to the app in src.main (advanced ensembles or the single-file app)"""
+
+    def __init__(self):
+        import src.main as app
+        from src.ai_models.model_utils import MolecularFeatureExtractor
+
+        self.app = app
+        self.ai = app.molecular_ai
+        self.extractor = MolecularFeatureExtractor()
+        self.ensemble = hasattr(self.ai, "predict_batch")
+        if self.ensemble:
+            # Models load from MODEL_DIR (or train on first use); no network or GPU needed
+            self.loop = asyncio.new_event_loop()
+            if not self.ai.is_initialized:
+                self.loop.run_until_complete(self.ai.initialize())
+            if not app.molecular_generator.is_initialized:
+                self.loop.run_until_complete(app.molecular_generator.initialize())
+
+    @property
+    def name(self) -> str:
+        return "advanced" if self.ensemble else "single-file"
+
+    def extract(self, smiles: List[str]) -> np.ndarray:
+        return self.extractor.transform(smiles)
+
+    def prepare(self, smiles: List[str]):
+        """Model inputs for the prediction cases (computed outside the timings)"""
+        if not self.ensemble:
+            return smiles
+        return np.vstack([self.loop.run_until_complete(self.ai._calculate_molecular_descriptors(s)) for s in smiles])
+
+    def predict_single(self, inputs) -> List[Dict[str, Any]]:
+        if self.ensemble:
+            return [self.ai.predict_batch(inputs[i:i + 1])[0] for i in range(len(inputs))]
+        return [self.ai.predict_properties(smiles) for smiles in inputs]
+
+    def predict_batch(self, inputs) -> List[Dict[str, Any]]:
+        if self.ensemble:
+            return self.ai.predict_batch(inputs)
+        return self.ai.records_from_batch(self.ai.predict_properties_batch(inputs))
+
+    def generate(self, count: int) -> List[Dict[str, Any]]:
+        if self.ensemble:
+            return self.app.molecular_generator.build_molecules(TARGET_PROPERTIES, count)["molecules"]
+        # The single-file endpoint caps each call at 50 molecules
+        molecules = []
+        while len(molecules) < count:
+            chunk = min(50, count - len(molecules))
+            molecules += self.app.generate_molecules({"target_properties": TARGET_PROPERTIES, "count": chunk})["molecules"]
+        return molecules
+
+def run_suite(sizes=SIZES, cases=CASES, single_max: int = 100, benchmark: Optional[Benchmark] = None,
+              targets: Optional[AppTargets] = None, verbose: bool = True) -> Dict[str, Any]:
+    """Run every case at every size; returns a baseline-shaped document"""
+    benchmark = benchmark or Benchmark()
+    targets = targets or AppTargets()
+    library = make_library(max(sizes))
+    results = {}
+
+    for size in sizes:
+        smiles = library[:size]
+        inputs = targets.prepare(smiles) if {"predict_single", "predict_batch", "serialize"} & set(cases) else None
+        plan = {
+            "features": lambda: targets.extract(smiles),
+            "predict_single": lambda: targets.predict_single(inputs),
+            "predict_batch": lambda: targets.predict_batch(inputs),
+            "generate": lambda: targets.generate(size)
+        }
+        if "serialize" in cases:
+            records = targets.predict_batch(inputs)
+            plan["serialize"] = lambda: json.dumps(records)
+
+        for case in cases:
+            if case == "predict_single" and size > single_max:
+                continue  # one model call per molecule: too slow to repeat at large sizes
+            name = f"{case}/{size}"
+            results[name] = benchmark.run(plan[case], size)
+            if verbose:
+                print_result(name, results[name])
+
+    return {
+        "created": datetime.now().isoformat(),
+        "environment": {
+            "app": targets.name,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "results": results
+    }
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.25) -> List[Dict[str, Any]]:
+    """Median-time ratio per case present in both runs; a ratio above 1 + threshold is a regression"""
+    comparison = []
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None or not reference["p50_ms"]:
+            continue
+        ratio = result["p50_ms"] / reference["p50_ms"]
+        comparison.append({
+            "case": name,
+            "baseline_p50_ms": reference["p50_ms"],
+            "current_p50_ms": result["p50_ms"],
+            "ratio": ratio,
+            "regression": ratio > 1 + threshold
+        })
+    return comparison
+
+def print_result(name: str, result: Dict[str, float]):
+    print(f"  {name:<22} p50 {result['p50_ms']:>10.3f}ms  p95 {result['p95_ms']:>10.3f}ms  "
+          f"p99 {result['p99_ms']:>10.3f}ms  cv {result['cv']:>5.1%}  {result['molecules_per_second']:>12,.0f} mol/s")
+
+def save_results(document: Dict[str, Any], path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ChemAI Discovery and check for regressions")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="Molecules per operation")
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=CASES, help="Cases to run")
+    parser.add_argument("--single-max", type=int, default=100, help="Largest size for the per-molecule prediction loop")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed runs per case")
+    parser.add_argument("--min-repeats", type=int, default=5, help="Timed runs per case, at least")
+    parser.add_argument("--max-repeats", type=int, default=50, help="Timed runs per case, at most")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds to keep repeating each case")
+    parser.add_argument("--save", metavar="PATH", help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", nargs="?", const=DEFAULT_BASELINE,
+                        help=f"Compare against a saved baseline (default {os.path.relpath(DEFAULT_BASELINE)})")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown before a case counts as a regression")
+    args = parser.parse_args()
+
+    print(f"⚡ ChemAI Discovery benchmarks (sizes {', '.join(map(str, args.sizes))})")
+    benchmark = Benchmark(args.warmup, args.min_repeats, args.max_repeats, args.min_time)
+    document = run_suite(args.sizes, args.cases, args.single_max, benchmark)
+
+    if args.save:
+        save_results(document, args.save)
+        print(f"💾 Baseline saved to {args.save}")
+
+    if args.compare:
+        comparison = compare_results(document, load_results(args.compare), args.threshold)
+        print(f"\n📊 Comparison with {args.compare} (threshold +{args.threshold:.0%})")
+        for row in comparison:
+            flag = "❌ REGRESSION" if row["regression"] else "✅"
+            print(f"  {row['case']:<22} {row['baseline_p50_ms']:>10.3f}ms -> {row['current_p50_ms']:>10.3f}ms  "
+                  f"{row['ratio']:>6.2f}x  {flag}")
+        regressions = [row["case"] for row in comparison if row["regression"]]
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+        print("✅ No regressions")
+
+if __name__ == "__main__":
+    main()
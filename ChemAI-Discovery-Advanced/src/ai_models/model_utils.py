@@ -3,20 +3,503 @@ Advanced AI Model Utilities for ChemAI Discovery
 Production-ready molecular property prediction models
 """
 
+import os
+import re
+import json
+import shutil
+import hashlib
+import itertools
+import tempfile
+import threading
 import numpy as np
 import pandas as pd
-from sklearn.base import BaseEstimator, TransformerMixin
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from operator import attrgetter
+from sklearn.base import BaseEstimator, TransformerMixin, clone
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
-from typing import Dict, List, Tuple, Any
+from typing import Dict, Iterable, Iterator, List, Tuple, Any, Optional
 import logging
 
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock on the descriptor cache tier
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
+def canonical_smiles(smiles: str) -> str:
+    """Canonical form used for seeding and cache keys (whitespace-insensitive until a real canonicalizer lands)"""
+    return smiles.strip()
+
+def smiles_seed(smiles: str) -> int:
+    """Process-stable seed derived from a digest of the canonical SMILES"""
+    digest = hashlib.blake2b(canonical_smiles(smiles).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+# SMILES parsing
+# Elements accepted in SMILES: symbol -> (atomic number, average mass, default valences)
+ELEMENTS = {
+    '*': (0, 0.0, ()),
+    'H': (1, 1.008, (1,)),
+    'Li': (3, 6.94, (1,)),
+    'B': (5, 10.81, (3,)),
+    'C': (6, 12.011, (4,)),
+    'N': (7, 14.007, (3, 5)),
+    'O': (8, 15.999, (2,)),
+    'F': (9, 18.998, (1,)),
+    'Na': (11, 22.990, (1,)),
+    'Mg': (12, 24.305, (2,)),
+    'Al': (13, 26.982, (3,)),
+    'Si': (14, 28.085, (4,)),
+    'P': (15, 30.974, (3, 5)),
+    'S': (16, 32.06, (2, 4, 6)),
+    'Cl': (17, 35.45, (1,)),
+    'K': (19, 39.098, (1,)),
+    'Ca': (20, 40.078, (2,)),
+    'Mn': (25, 54.938, ()),
+    'Fe': (26, 55.845, ()),
+    'Co': (27, 58.933, ()),
+    'Cu': (29, 63.546, ()),
+    'Zn': (30, 65.38, ()),
+    'As': (33, 74.922, (3, 5)),
+    'Se': (34, 78.971, (2, 4, 6)),
+    'Br': (35, 79.904, (1,)),
+    'Sn': (50, 118.71, ()),
+    'Te': (52, 127.60, (2, 4, 6)),
+    'I': (53, 126.904, (1,)),
+    'Pt': (78, 195.08, ()),
+    'Hg': (80, 200.59, ())
+}
+ATOMIC_MASS = np.zeros(128)
+DEFAULT_VALENCES = {}
+ELEMENT_SYMBOLS = {}
+for _symbol, (_number, _mass, _valences) in ELEMENTS.items():
+    ATOMIC_MASS[_number] = _mass
+    DEFAULT_VALENCES[_number] = _valences
+    ELEMENT_SYMBOLS[_number] = _symbol
+
+# Valence electrons for the Kier-Hall valence delta (Z_v - h) / (Z - Z_v - 1)
+VALENCE_ELECTRONS = np.zeros(128)
+VALENCE_ELECTRONS[[1, 3, 5, 6, 7, 8, 9, 11, 12, 13, 14, 15, 16, 17, 19, 20, 25, 26, 27, 29, 30,
+                   33, 34, 35, 50, 52, 53, 78, 80]] = [1, 1, 3, 4, 5, 6, 7, 1, 2, 3, 4, 5, 6, 7, 1, 2, 7, 8, 9, 11, 12,
+                                                       5, 6, 7, 4, 6, 7, 10, 12]
+
+# Bond order codes; aromatic bonds count 1.5 towards valence
+AROMATIC_BOND = 5
+BOND_ORDERS = {'-': 1, '/': 1, '\\': 1, '=': 2, '#': 3, '$': 4, ':': AROMATIC_BOND}
+BOND_VALENCE = (0.0, 1.0, 2.0, 3.0, 4.0, 1.5)
+
+SMILES_TOKEN = re.compile(r'(\[[^\[\]]*\])|(Cl|Br|[BCNOPSFI*]|[bcnops])|([-=#$:/\\])|(%\d\d|\d)|([().])')
+BRACKET_ATOM = re.compile(r'\[(\d+)?(\*|[A-Z][a-z]?|se|as|te|[bcnops])(@@?|@[A-Z]{2}\d\d?)?(?:H(\d?))?([+-](?:\d+|\+*|-*))?(?::\d+)?\]$')
+ORGANIC_ATOMS = {symbol: (ELEMENTS[symbol.capitalize()][0], symbol.islower())
+                 for symbol in ('B', 'C', 'N', 'O', 'P', 'S', 'F', 'Cl', 'Br', 'I', '*', 'b', 'c', 'n', 'o', 'p', 's')}
+SMILES_CACHE_SIZE = 65536
+
+class MolGraph:
+    """Parsed molecule: int8 per-atom arrays, a bond list with int8 orders, and CSR adjacency (int32)"""
+    
+    __slots__ = ('atoms', 'aromatic', 'charges', 'hydrogens', 'bonds', 'orders', 'ring_bonds',
+                 'offsets', 'neighbors', 'fragments')
+    
+    def __init__(self, atoms: np.ndarray, aromatic: np.ndarray, charges: np.ndarray, hydrogens: np.ndarray,
+                 bonds: np.ndarray, orders: np.ndarray, ring_bonds: np.ndarray,
+                 offsets: np.ndarray, neighbors: np.ndarray, fragments: int = 1):
+        self.atoms = atoms            # int8 atomic numbers
+        self.aromatic = aromatic      # bool per atom
+        self.charges = charges        # int8 formal charges
+        self.hydrogens = hydrogens    # int8 explicit + implicit hydrogens
+        self.bonds = bonds            # int32 (n_bonds, 2) atom pairs
+        self.orders = orders          # int8 bond order codes (AROMATIC_BOND for aromatic)
+        self.ring_bonds = ring_bonds  # bool per bond
+        self.offsets = offsets        # int32 (n_atoms + 1): atom i's neighbors are neighbors[offsets[i]:offsets[i + 1]]
+        self.neighbors = neighbors    # int32 (2 * n_bonds)
+        self.fragments = fragments    # connected components, e.g. 2 for [Na+].[Cl-]
+    
+    @property
+    def n_atoms(self) -> int:
+        return len(self.atoms)
+    
+    @property
+    def n_bonds(self) -> int:
+        return len(self.bonds)
+    
+    @property
+    def ring_count(self) -> int:
+        """Independent rings (cyclomatic number)"""
+        return len(self.bonds) - len(self.atoms) + self.fragments
+    
+    @property
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.offsets)
+    
+    @property
+    def symbols(self) -> List[str]:
+        return [ELEMENT_SYMBOLS[number] for number in self.atoms.tolist()]
+    
+    def neighbors_of(self, atom: int) -> np.ndarray:
+        return self.neighbors[self.offsets[atom]:self.offsets[atom + 1]]
+
+class MolGraphBatch:
+    """Many molecules in one set of flat arrays; batch[i] is a zero-copy MolGraph view of molecule i
+    
+    Per-atom and per-bond fields are concatenated in molecule order, each molecule keeping its local atom
+    indices. atom_index/bond_index hold each molecule's first atom and bond, so a library of a million
+    molecules is a dozen arrays (about 30 bytes per atom) instead of a million Python objects.
+    A batch saved with save() and reopened with load(mmap_mode='r') pickles as its path: process pool
+    workers memory-map the same pages instead of receiving a copy.
+    """
+    
+    ATOM_FIELDS = ('atoms', 'aromatic', 'charges', 'hydrogens')
+    BOND_FIELDS = ('bonds', 'orders', 'ring_bonds')
+    FIELDS = ATOM_FIELDS + BOND_FIELDS + ('offsets', 'neighbors', 'fragments', 'atom_index', 'bond_index')
+    
+    def __init__(self, arrays: Dict[str, np.ndarray], path: Optional[str] = None):
+        self.arrays = arrays
+        self.path = path
+        for name in self.FIELDS:
+            setattr(self, name, arrays[name])
+    
+    @classmethod
+    def from_graphs(cls, graphs: List[MolGraph]) -> 'MolGraphBatch':
+        n_atoms = np.fromiter((len(g.atoms) for g in graphs), dtype=np.int64, count=len(graphs))
+        n_bonds = np.fromiter((len(g.bonds) for g in graphs), dtype=np.int64, count=len(graphs))
+        if not graphs:
+            graphs = [parse_smiles('C')]  # supplies dtypes and shapes; its arrays are sliced away below
+            n_atoms = n_bonds = np.zeros(0, dtype=np.int64)
+        
+        arrays = {name: np.concatenate(list(map(attrgetter(name), graphs)))
+                  for name in cls.ATOM_FIELDS + cls.BOND_FIELDS + ('offsets', 'neighbors')}
+        if not len(n_atoms):
+            arrays = {name: array[:0] for name, array in arrays.items()}
+        arrays['fragments'] = np.fromiter((g.fragments for g in graphs), dtype=np.int32, count=len(n_atoms))
+        arrays['atom_index'] = np.concatenate([[0], np.cumsum(n_atoms)])
+        arrays['bond_index'] = np.concatenate([[0], np.cumsum(n_bonds)])
+        return cls(arrays)
+    
+    @classmethod
+    def from_smiles(cls, smiles: List[str], chunk_size: int = 10000) -> 'MolGraphBatch':
+        """Parse a library chunk by chunk, so only one chunk of MolGraph objects is alive at a time"""
+        return cls.concatenate([cls.from_graphs([parse_smiles(s.strip()) for s in smiles[start:start + chunk_size]])
+                                for start in range(0, len(smiles), chunk_size)])
+    
+    @classmethod
+    def concatenate(cls, batches: List['MolGraphBatch']) -> 'MolGraphBatch':
+        if len(batches) == 1:
+            return batches[0]
+        if not batches:
+            return cls.from_graphs([])
+        
+        arrays = {name: np.concatenate([b.arrays[name] for b in batches])
+                  for name in cls.ATOM_FIELDS + cls.BOND_FIELDS + ('offsets', 'neighbors', 'fragments')}
+        for name in ('atom_index', 'bond_index'):
+            starts = np.cumsum([0] + [b.arrays[name][-1] for b in batches[:-1]])
+            arrays[name] = np.concatenate([[0]] + [b.arrays[name][1:] + start for b, start in zip(batches, starts)])
+        return cls(arrays)
+    
+    def __len__(self) -> int:
+        return len(self.atom_index) - 1
+    
+    def __getitem__(self, i: int) -> MolGraph:
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        i %= len(self)
+        a0, a1 = int(self.atom_index[i]), int(self.atom_index[i + 1])
+        b0, b1 = int(self.bond_index[i]), int(self.bond_index[i + 1])
+        return MolGraph(
+            self.atoms[a0:a1], self.aromatic[a0:a1], self.charges[a0:a1], self.hydrogens[a0:a1],
+            self.bonds[b0:b1], self.orders[b0:b1], self.ring_bonds[b0:b1],
+            self.offsets[a0 + i:a1 + i + 1], self.neighbors[2 * b0:2 * b1], int(self.fragments[i])
+        )
+    
+    @property
+    def n_atoms(self) -> np.ndarray:
+        return np.diff(self.atom_index)
+    
+    @property
+    def n_bonds(self) -> np.ndarray:
+        return np.diff(self.bond_index)
+    
+    @property
+    def atom_owner(self) -> np.ndarray:
+        """Molecule of every atom"""
+        return np.repeat(np.arange(len(self)), self.n_atoms)
+    
+    @property
+    def bond_owner(self) -> np.ndarray:
+        """Molecule of every bond"""
+        return np.repeat(np.arange(len(self)), self.n_bonds)
+    
+    def global_bonds(self) -> np.ndarray:
+        """Bond pairs as indices into the concatenated atom arrays"""
+        return self.bonds + np.repeat(self.atom_index[:-1], self.n_bonds)[:, np.newaxis].astype(np.int32)
+    
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays.values())
+    
+    def save(self, path: str) -> str:
+        """Write one .npy file per field into a directory"""
+        os.makedirs(path, exist_ok=True)
+        for name, array in self.arrays.items():
+            np.save(os.path.join(path, f'{name}.npy'), array)
+        return path
+    
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = 'r') -> 'MolGraphBatch':
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode) for name in cls.FIELDS}
+        return cls(arrays, path if mmap_mode else None)
+    
+    def __reduce__(self):
+        if self.path is not None:
+            return (self.load, (self.path, 'r'))
+        return (self.__class__, (self.arrays,))
+
+def all_pairs_distances(adjacency: np.ndarray, chunk_bytes: int = 1 << 18) -> np.ndarray:
+    """Batched Floyd-Warshall over a stack of equally sized 0/1 adjacency matrices, in place
+    
+    Returns topological distances with unreachable pairs (other fragments, padding) at
+    np.iinfo(dtype).max // 2. Molecules are processed in chunks that fit in cache; uint8 is used
+    below 127 atoms since a sum of two distances then cannot overflow.
+    """
+    n_mol, n = adjacency.shape[:2]
+    dtype = np.uint8 if n < 127 else np.uint16
+    unreachable = np.iinfo(dtype).max // 2
+    distances = np.where(adjacency > 0, 1, unreachable).astype(dtype)
+    distances[:, np.arange(n), np.arange(n)] = 0
+    
+    chunk = max(1, chunk_bytes // max(1, n * n * distances.itemsize))
+    for start in range(0, n_mol, chunk):
+        block = distances[start:start + chunk]
+        through = np.empty_like(block)
+        for k in range(n):
+            np.add(block[:, :, k, np.newaxis], block[:, np.newaxis, k, :], out=through)
+            np.minimum(block, through, out=block)
+    return distances
+
+def _implicit_hydrogens(number: int, valence: float, aromatic: bool) -> int:
+    """Hydrogens that fill an organic-subset atom up to its lowest default valence that fits"""
+    valences = DEFAULT_VALENCES[number]
+    bonded = int(valence)
+    if not valences:
+        return 0
+    if aromatic:
+        return max(0, valences[0] - bonded)
+    for target in valences:
+        if target >= bonded:
+            return target - bonded
+    return 0
+
+@lru_cache(maxsize=SMILES_CACHE_SIZE)
+def parse_smiles(smiles: str) -> MolGraph:
+    """Single-pass SMILES parser (atoms incl. bracket atoms, bonds, branches, ring closures); raises ValueError"""
+    atoms, aromatic, charges, hydrogens, bracketed, valence = [], [], [], [], [], []
+    bonds, orders, pairs = [], [], set()
+    parent, parent_bond, depth = [], [], []  # spanning tree of chain bonds, for ring-bond marking
+    adjacency = []
+    ring_bond_ids, fragments = set(), 0
+    branches, rings = [], {}
+    previous, bond, last, position = None, None, None, 0
+    
+    def connect(a: int, b: int, order: Optional[int]) -> int:
+        if order is None:
+            order = AROMATIC_BOND if aromatic[a] and aromatic[b] else 1
+        pair = (a, b) if a < b else (b, a)
+        if pair in pairs:
+            raise ValueError('Duplicate bond between the same atoms')
+        pairs.add(pair)
+        bonds.append(pair)
+        orders.append(order)
+        adjacency[a].append(b)
+        adjacency[b].append(a)
+        valence[a] += BOND_VALENCE[order]
+        valence[b] += BOND_VALENCE[order]
+        return len(bonds) - 1
+    
+    for match in SMILES_TOKEN.finditer(smiles):
+        if match.start() != position:
+            break
+        position = match.end()
+        bracket, organic, bond_symbol, ring, structure = match.groups()
+        
+        if organic or bracket:
+            if bracket:
+                parts = BRACKET_ATOM.match(bracket)
+                if parts is None:
+                    raise ValueError(f'Invalid bracket atom {bracket}')
+                _, symbol, _, h_count, charge = parts.groups()
+                element = ELEMENTS.get(symbol.capitalize())
+                if element is None:
+                    raise ValueError(f'Unknown element {symbol}')
+                atoms.append(element[0])
+                aromatic.append(symbol.islower())
+                hydrogens.append(0 if h_count is None else int(h_count or 1))
+                if charge:
+                    sign = 1 if charge[0] == '+' else -1
+                    charges.append(sign * (int(charge[1:]) if charge[1:].isdigit() else len(charge)))
+                else:
+                    charges.append(0)
+            else:
+                number, is_aromatic = ORGANIC_ATOMS[organic]
+                atoms.append(number)
+                aromatic.append(is_aromatic)
+                hydrogens.append(0)
+                charges.append(0)
+            bracketed.append(bool(bracket))
+            valence.append(0.0)
+            adjacency.append([])
+            
+            index = len(atoms) - 1
+            if previous is None:
+                fragments += 1
+                parent.append(-1)
+                parent_bond.append(-1)
+                depth.append(0)
+            else:
+                parent.append(previous)
+                parent_bond.append(connect(previous, index, bond))
+                depth.append(depth[previous] + 1)
+            previous, bond, last = index, None, 'atom'
+        
+        elif bond_symbol:
+            if last not in ('atom', 'ring', 'close', 'open'):
+                raise ValueError(f'Misplaced bond {bond_symbol!r}')
+            bond, last = BOND_ORDERS[bond_symbol], 'bond'
+        
+        elif ring:
+            if last not in ('atom', 'ring', 'bond') or previous is None:
+                raise ValueError(f'Ring closure {ring} without an atom')
+            label = int(ring.lstrip('%'))
+            if label in rings:
+                partner, ring_order = rings.pop(label)
+                if partner == previous:
+                    raise ValueError('Ring closure to the same atom')
+                if bond is not None and ring_order is not None and bond != ring_order:
+                    raise ValueError(f'Conflicting bond orders on ring closure {ring}')
+                closure = connect(partner, previous, bond if bond is not None else ring_order)
+                
+                # Every chain bond on the tree path between the two ends lies on this ring
+                path, a, b = [closure], partner, previous
+                while a != b and a >= 0 and b >= 0:
+                    if depth[a] >= depth[b]:
+                        path.append(parent_bond[a])
+                        a = parent[a]
+                    else:
+                        path.append(parent_bond[b])
+                        b = parent[b]
+                if a == b:
+                    ring_bond_ids.update(path)
+                else:
+                    fragments -= 1  # joined two dot-separated parts instead of closing a ring
+            else:
+                rings[label] = (previous, bond)
+            bond, last = None, 'ring'
+        
+        elif structure == '(':
+            if last not in ('atom', 'ring', 'close'):
+                raise ValueError('Branch without a preceding atom')
+            branches.append((previous, len(atoms)))
+            last = 'open'
+        
+        elif structure == ')':
+            if not branches or last not in ('atom', 'ring', 'close') or branches[-1][1] == len(atoms):
+                raise ValueError('Unbalanced parentheses or empty branch')
+            previous, last = branches.pop()[0], 'close'
+        
+        else:
+            if last not in ('atom', 'ring', 'close') or branches:
+                raise ValueError('Misplaced dot')
+            previous, last = None, 'dot'
+    
+    if position != len(smiles):
+        raise ValueError(f'Unexpected character {smiles[position]!r} at position {position}')
+    if not atoms:
+        raise ValueError('No atoms found')
+    if branches:
+        raise ValueError('Unbalanced parentheses')
+    if rings:
+        raise ValueError(f'Unclosed ring {min(rings)}')
+    if last not in ('atom', 'ring', 'close'):
+        raise ValueError('SMILES ends with a bond or dot')
+    
+    for i, number in enumerate(atoms):
+        if not bracketed[i]:
+            hydrogens[i] = _implicit_hydrogens(number, valence[i], aromatic[i])
+    
+    ring_bonds = np.zeros(len(bonds), dtype=bool)
+    ring_bonds[list(ring_bond_ids)] = True
+    offsets = np.zeros(len(atoms) + 1, dtype=np.int32)
+    np.cumsum([len(neighbors) for neighbors in adjacency], out=offsets[1:])
+    graph = MolGraph(
+        np.array(atoms, dtype=np.int8), np.array(aromatic, dtype=bool), np.array(charges, dtype=np.int8),
+        np.array(hydrogens, dtype=np.int8), np.array(bonds, dtype=np.int32).reshape(-1, 2),
+        np.array(orders, dtype=np.int8), ring_bonds,
+        offsets, np.array([atom for neighbors in adjacency for atom in neighbors], dtype=np.int32), fragments
+    )
+    # Cached graphs are shared between callers
+    for name in MolGraph.__slots__[:-1]:
+        getattr(graph, name).flags.writeable = False
+    return graph
+
+class BatchRandom:
+    """Vectorized per-molecule random draws: row i follows a SplitMix64 stream seeded by molecule i"""
+    
+    GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+    
+    def __init__(self, seeds: np.ndarray):
+        self.seeds = seeds.astype(np.uint64)
+        self.draws = 0
+    
+    def uniform(self, low: float = 0.0, high: float = 1.0) -> np.ndarray:
+        """Next uniform column in (low, high)"""
+        self.draws += 1
+        with np.errstate(over='ignore'):
+            state = self.seeds + np.uint64(self.draws) * self.GOLDEN_GAMMA
+            state = (state ^ (state >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+            state = (state ^ (state >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        state = state ^ (state >> np.uint64(31))
+        u = ((state >> np.uint64(11)).astype(np.float64) + 0.5) / float(1 << 53)
+        return low + (high - low) * u
+    
+    def normal(self, loc: float = 0.0, scale: float = 1.0) -> np.ndarray:
+        """Box-Muller normal column"""
+        radius = np.sqrt(-2.0 * np.log(self.uniform()))
+        return loc + scale * radius * np.cos(2 * np.pi * self.uniform())
+    
+    def exponential(self, scale: float = 1.0) -> np.ndarray:
+        return -scale * np.log(self.uniform())
+    
+    def gamma(self, shape: float, scale: float = 1.0) -> np.ndarray:
+        """Gamma column for integer or half-integer shapes (sum of exponentials plus a chi-square half)"""
+        whole = int(shape)
+        if shape - whole not in (0.0, 0.5):
+            raise ValueError(f"Unsupported gamma shape {shape}")
+        
+        total = np.zeros(len(self.seeds))
+        for _ in range(whole):
+            total -= np.log(self.uniform())
+        if shape - whole:
+            total += 0.5 * self.normal() ** 2
+        return scale * total
+    
+    def integers(self, low: int, high: int) -> np.ndarray:
+        """Integer column in [low, high)"""
+        return low + np.floor(self.uniform() * (high - low))
+    
+    def beta(self, a: float, b: float) -> np.ndarray:
+        x = self.gamma(a)
+        return x / (x + self.gamma(b))
+
 class MolecularFeatureExtractor(BaseEstimator, TransformerMixin):
     """Advanced molecular feature extraction for pharmaceutical compounds"""
     
-    def __init__(self, feature_types=['constitutional', 'topological', 'electronic', 'physicochemical']):
+    def __init__(self, feature_types=['constitutional', 'topological', 'electronic', 'physicochemical'],
+                 n_jobs=1, chunk_size=10000):
         self.feature_types = feature_types
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
         self.feature_names_ = []
         
     def fit(self, X, y=None):
@@ -25,16 +508,30 @@ class MolecularFeatureExtractor(BaseEstimator, TransformerMixin):
         return self
     
     def transform(self, X):
-        """Transform SMILES strings to molecular descriptors"""
+        """Transform SMILES strings to a float32 descriptor matrix, chunk by chunk"""
         if isinstance(X, str):
             X = [X]
+        if not isinstance(X, (list, np.ndarray)):
+            X = list(X)
+        
+        n_samples = len(X)
+        features = np.empty((n_samples, len(self._generate_feature_names())), dtype=np.float32)
+        chunks = [(start, min(start + self.chunk_size, n_samples))
+                  for start in range(0, n_samples, self.chunk_size)]
+        
+        def fill(bounds):
+            start, stop = bounds
+            features[start:stop] = self._descriptor_block(list(X[start:stop]))
         
-        features = []
-        for smiles in X:
-            mol_features = self._extract_molecular_features(smiles)
-            features.append(mol_features)
+        n_jobs = os.cpu_count() if self.n_jobs in (None, -1) else self.n_jobs
+        if n_jobs <= 1 or len(chunks) <= 1:
+            for bounds in chunks:
+                fill(bounds)
+        else:
+            with ThreadPoolExecutor(max_workers=min(n_jobs, len(chunks))) as executor:
+                list(executor.map(fill, chunks))
         
-        return np.array(features)
+        return features
     
     def _generate_feature_names(self):
         """Generate comprehensive feature names"""
@@ -72,94 +569,563 @@ class MolecularFeatureExtractor(BaseEstimator, TransformerMixin):
     
     def _extract_molecular_features(self, smiles: str) -> np.ndarray:
         """Extract comprehensive molecular features from SMILES"""
-        # Use hash for reproducible random features based on SMILES
-        np.random.seed(hash(smiles) % 2**32)
+        return self.transform([smiles])[0]
+    
+    def _descriptor_block(self, smiles: List[str]) -> np.ndarray:
+        """Descriptor columns for a list of SMILES, parsed once"""
+        graphs = []
+        for i, s in enumerate(smiles):
+            try:
+                graphs.append(parse_smiles(s.strip()))
+            except ValueError as e:
+                raise ValueError(f"Invalid SMILES {s!r} at row {i}: {e}") from None
+        
+        batch = MolGraphBatch.from_graphs(graphs)
+        
+        # Per-molecule streams seeded from the SMILES digest: rows don't depend on batch composition
+        if {'electronic', 'physicochemical'} & set(self.feature_types):
+            rng = BatchRandom(np.fromiter((smiles_seed(s) for s in smiles), dtype=np.uint64, count=len(smiles)))
         
-        features = []
+        columns = []
         
         if 'constitutional' in self.feature_types:
-            features.extend(self._calculate_constitutional_descriptors(smiles))
+            columns.extend(self._calculate_constitutional_descriptors(batch))
         
         if 'topological' in self.feature_types:
-            features.extend(self._calculate_topological_descriptors(smiles))
+            columns.extend(self._calculate_topological_descriptors(batch))
         
         if 'electronic' in self.feature_types:
-            features.extend(self._calculate_electronic_descriptors(smiles))
+            columns.extend(self._calculate_electronic_descriptors(rng))
         
         if 'physicochemical' in self.feature_types:
-            features.extend(self._calculate_physicochemical_descriptors(smiles))
+            columns.extend(self._calculate_physicochemical_descriptors(rng))
         
-        return np.array(features)
+        return np.column_stack(columns) if columns else np.empty((len(smiles), 0))
     
-    def _calculate_constitutional_descriptors(self, smiles: str) -> List[float]:
+    def _calculate_constitutional_descriptors(self, batch: MolGraphBatch) -> List[np.ndarray]:
         """Calculate constitutional molecular descriptors"""
+        n = len(batch)
+        atoms = batch.atoms.astype(np.intp)
+        hydrogens, orders, ring_bonds = batch.hydrogens, batch.orders, batch.ring_bonds
+        atom_owner, bond_owner = batch.atom_owner, batch.bond_owner
+        bonds = batch.global_bonds()
+        heavy = atoms > 1
+        heavy_bond = heavy[bonds[:, 0]] & heavy[bonds[:, 1]]
+        degree = np.bincount(bonds[heavy_bond].ravel(), minlength=len(atoms))
+        polar = (atoms == 7) | (atoms == 8)
+        rotatable = (heavy_bond & (orders == 1) & ~ring_bonds
+                     & (degree[bonds[:, 0]] > 1) & (degree[bonds[:, 1]] > 1))
+        
+        def per_atom(values):
+            return np.bincount(atom_owner, weights=values, minlength=n)
+        
+        def per_bond(values):
+            return np.bincount(bond_owner, weights=values, minlength=n)
+        
         return [
-            len(smiles) * 12 + np.random.normal(0, 20),  # molecular_weight
-            len(smiles) + np.random.randint(-5, 10),     # atom_count
-            smiles.count('=') + smiles.count('#') + len(smiles) * 0.8,  # bond_count
-            smiles.count('1') + smiles.count('2'),       # ring_count
-            smiles.count('c'),                           # aromatic_count
-            smiles.count('N') + smiles.count('O'),       # heteroatom_count
-            max(0, len(smiles) // 5 + np.random.randint(-2, 3)),  # rotatable_bonds
-            smiles.count('O') + smiles.count('N'),       # hydrogen_donors
-            smiles.count('O') + smiles.count('N'),       # hydrogen_acceptors
-            np.random.normal(0, 0.5)                     # formal_charge
+            per_atom(ATOMIC_MASS[atoms] + hydrogens * ATOMIC_MASS[1]),       # molecular_weight
+            per_atom(heavy),                                                 # atom_count
+            per_bond(heavy_bond),                                            # bond_count
+            batch.n_bonds - batch.n_atoms + batch.fragments,                 # ring_count
+            per_atom(batch.aromatic),                                        # aromatic_count
+            per_atom(heavy & (atoms != 6)),                                  # heteroatom_count
+            per_bond(rotatable),                                             # rotatable_bonds
+            per_atom(polar & (hydrogens > 0)),                               # hydrogen_donors
+            per_atom(polar),                                                 # hydrogen_acceptors
+            per_atom(batch.charges)                                          # formal_charge
         ]
     
-    def _calculate_topological_descriptors(self, smiles: str) -> List[float]:
-        """Calculate topological molecular descriptors"""
+    def _calculate_topological_descriptors(self, batch: MolGraphBatch, bucket: int = 8) -> List[np.ndarray]:
+        """Calculate topological molecular descriptors on the hydrogen-suppressed graph
+        
+        Degree-based indices are per-atom/per-bond bincounts. Distance-based indices come from
+        all_pairs_distances run once per size bucket, with molecules padded to the next multiple of `bucket`.
+        """
+        n = len(batch)
+        atoms = batch.atoms.astype(np.intp)
+        heavy = atoms > 1
+        atom_owner, bond_owner = batch.atom_owner, batch.bond_owner
+        bonds = batch.global_bonds()
+        heavy_bond = heavy[bonds[:, 0]] & heavy[bonds[:, 1]]
+        bonds, bond_mol = bonds[heavy_bond], bond_owner[heavy_bond]
+        
+        # Heavy atoms renumbered 0..n_heavy-1 within each molecule
+        heavy_before = np.concatenate([[0], np.cumsum(heavy)])
+        local = heavy_before[1:] - 1 - heavy_before[batch.atom_index[:-1]][atom_owner]
+        n_heavy = np.bincount(atom_owner[heavy], minlength=n)
+        n_edges = np.bincount(bond_mol, minlength=n)
+        
+        degree = np.bincount(bonds.ravel(), minlength=len(atoms)).astype(float)
+        valence_delta = ((VALENCE_ELECTRONS[atoms] - batch.hydrogens)
+                         / np.maximum(atoms - VALENCE_ELECTRONS[atoms] - 1, 1))
+        
+        def per_atom(values):
+            return np.bincount(atom_owner[heavy], weights=values[heavy], minlength=n)
+        
+        def per_edge(values):
+            return np.bincount(bond_mol, weights=values, minlength=n)
+        
+        def inverse_sqrt(values):
+            return np.divide(1.0, np.sqrt(values), out=np.zeros_like(values), where=values > 0)
+        
+        first, second = bonds[:, 0], bonds[:, 1]
+        zagreb = per_atom(degree ** 2)
+        connectivity = per_atom(inverse_sqrt(degree))
+        randic = per_edge(inverse_sqrt(degree[first] * degree[second]))
+        kier_hall = per_edge(inverse_sqrt(np.maximum(valence_delta[first] * valence_delta[second], 0)))
+        
+        wiener, components, diameter, radius, eccentricity = (np.zeros(n) for _ in range(5))
+        distance_sum = np.zeros(len(atoms))
+        size = -(-n_heavy // bucket) * bucket
+        slot = np.zeros(n, dtype=np.intp)
+        for width in np.unique(size[size > 0]):
+            members = np.flatnonzero(size == width)
+            slot[members] = np.arange(len(members))
+            in_bucket = size[bond_mol] == width
+            adjacency = np.zeros((len(members), width, width), dtype=np.uint8)
+            rows, i, j = slot[bond_mol[in_bucket]], local[first[in_bucket]], local[second[in_bucket]]
+            adjacency[rows, i, j] = adjacency[rows, j, i] = 1
+            
+            distances = all_pairs_distances(adjacency)
+            reachable = distances < np.iinfo(distances.dtype).max // 2
+            distances = np.where(reachable, distances, 0).astype(np.int32)
+            real = np.arange(width) < n_heavy[members, np.newaxis]
+            
+            row_sums = distances.sum(axis=2)
+            atom_eccentricity = distances.max(axis=2)
+            wiener[members] = row_sums.sum(axis=1) / 2
+            components[members] = (real / reachable.sum(axis=2)).sum(axis=1)
+            diameter[members] = np.where(real, atom_eccentricity, 0).max(axis=1)
+            radius[members] = np.where(real, atom_eccentricity, width).min(axis=1)
+            eccentricity[members] = (real * atom_eccentricity).sum(axis=1) / n_heavy[members]
+            
+            bucket_atoms = heavy & (size[atom_owner] == width)
+            distance_sum[bucket_atoms] = row_sums[slot[atom_owner[bucket_atoms]], local[bucket_atoms]]
+        
+        # Balaban J = m / (mu + 1) * sum over bonds of (s_i * s_j)^-1/2, s = distance sums, mu = cyclomatic number
+        cyclomatic = n_edges - n_heavy + components
+        balaban = n_edges / (cyclomatic + 1) * per_edge(inverse_sqrt(distance_sum[first] * distance_sum[second]))
+        petitjean = np.divide(diameter - radius, radius, out=np.zeros(n), where=radius > 0)
+        
         return [
-            np.random.gamma(2, 100),     # wiener_index
-            np.random.gamma(3, 50),      # zagreb_index
-            np.random.exponential(10),   # connectivity_index
-            np.random.gamma(1.5, 2),     # randic_index
-            np.random.gamma(2, 5),       # balaban_index
-            np.random.gamma(1, 3),       # kier_hall_index
-            np.random.uniform(0, 1),     # petitjean_index
-            np.random.randint(5, 20),    # diameter
-            np.random.randint(2, 10),    # radius
-            np.random.randint(1, 8)      # eccentricity
+            wiener,        # wiener_index
+            zagreb,        # zagreb_index (first Zagreb, sum of squared degrees)
+            connectivity,  # connectivity_index (zero-order chi)
+            randic,        # randic_index (first-order chi)
+            balaban,       # balaban_index
+            kier_hall,     # kier_hall_index (first-order valence chi)
+            petitjean,     # petitjean_index
+            diameter,      # diameter
+            radius,        # radius
+            eccentricity   # eccentricity (mean over atoms)
         ]
     
-    def _calculate_electronic_descriptors(self, smiles: str) -> List[float]:
+    def _calculate_electronic_descriptors(self, rng: BatchRandom) -> List[np.ndarray]:
         """Calculate electronic molecular descriptors"""
         return [
-            np.random.normal(0, 0.5),    # total_charge
-            np.random.exponential(3),    # dipole_moment
-            np.random.gamma(2, 15),      # polarizability
-            np.random.normal(9, 2),      # ionization_potential
-            np.random.normal(1, 0.5),    # electron_affinity
-            np.random.normal(2.5, 0.5),  # electronegativity
-            np.random.gamma(2, 2),       # hardness
-            np.random.gamma(1, 1),       # softness
-            np.random.gamma(3, 1),       # electrophilicity
-            np.random.gamma(2, 1)        # nucleophilicity
+            rng.normal(0, 0.5),    # total_charge
+            rng.exponential(3),    # dipole_moment
+            rng.gamma(2, 15),      # polarizability
+            rng.normal(9, 2),      # ionization_potential
+            rng.normal(1, 0.5),    # electron_affinity
+            rng.normal(2.5, 0.5),  # electronegativity
+            rng.gamma(2, 2),       # hardness
+            rng.gamma(1, 1),       # softness
+            rng.gamma(3, 1),       # electrophilicity
+            rng.gamma(2, 1)        # nucleophilicity
         ]
     
-    def _calculate_physicochemical_descriptors(self, smiles: str) -> List[float]:
+    def _calculate_physicochemical_descriptors(self, rng: BatchRandom) -> List[np.ndarray]:
         """Calculate physicochemical molecular descriptors"""
         return [
-            np.random.normal(2, 1.5),    # logp
-            np.random.gamma(3, 50),      # surface_area
-            np.random.gamma(4, 100),     # volume
-            np.random.beta(2, 3),        # flexibility
-            np.random.beta(3, 2),        # globularity
-            np.random.beta(2, 5),        # asphericity
-            np.random.gamma(5, 20),      # inertia_moment
-            np.random.gamma(3, 30),      # van_der_waals_volume
-            np.random.gamma(4, 40)       # solvent_accessible_surface
+            rng.normal(2, 1.5),  # logp
+            rng.gamma(3, 50),    # surface_area
+            rng.gamma(4, 100),   # volume
+            rng.beta(2, 3),      # flexibility
+            rng.beta(3, 2),      # globularity
+            rng.beta(2, 5),      # asphericity
+            rng.gamma(5, 20),    # inertia_moment
+            rng.gamma(3, 30),    # van_der_waals_volume
+            rng.gamma(4, 40)     # solvent_accessible_surface
         ]
 
+# Bump when a descriptor definition changes: rows cached under another version are never served
+FEATURE_SET_VERSION = 1
+DESCRIPTOR_CACHE_SIZE = int(os.getenv('DESCRIPTOR_CACHE_SIZE', '65536'))
+
+def feature_set_version(feature_types: List[str]) -> str:
+    """Identifier of the descriptor definitions behind a cached or stored row"""
+    return f"{FEATURE_SET_VERSION}-{'+'.join(feature_types)}"
+
+class DescriptorCache:
+    """LRU cache of descriptor rows keyed by (canonical SMILES, feature-set version), with an optional on-disk tier
+    
+    The disk tier is one directory per feature-set version. Each flush writes a new build directory holding
+    features.npy (float32, opened with mmap_mode='r' so every worker process shares its pages) and smiles.json
+    (the row keys), then publishes it by replacing the CURRENT pointer. Readers and writers serialize on an
+    flock over .lock, so a flush always merges the latest build and never pairs files from different builds.
+    Flushing is done by start_flushing()'s background thread and at shutdown, never on the request path.
+    """
+    
+    def __init__(self, extractor: Optional[MolecularFeatureExtractor] = None, max_size: int = DESCRIPTOR_CACHE_SIZE,
+                 directory: Optional[str] = None):
+        self.extractor = extractor or MolecularFeatureExtractor()
+        self.feature_names = self.extractor._generate_feature_names()
+        self.version = feature_set_version(self.extractor.feature_types)
+        self.max_size = max_size
+        self.directory = None
+        self._entries = OrderedDict()
+        self._pending = {}  # rows computed since the disk tier was opened
+        self._disk_rows = None
+        self._disk_index = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+        self._stop_flushing = threading.Event()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if directory:
+            self.open(directory)
+    
+    def _key(self, smiles: str):
+        return (canonical_smiles(smiles), self.version)
+    
+    def get(self, smiles: str) -> np.ndarray:
+        """Descriptor row for one molecule"""
+        return self.get_many([smiles])[0]
+    
+    def descriptors(self, smiles: str) -> Dict[str, float]:
+        """Descriptor row for one molecule, by feature name"""
+        return dict(zip(self.feature_names, self.get(smiles).tolist()))
+    
+    def get_many(self, smiles: List[str]) -> np.ndarray:
+        """Descriptor rows for a list of SMILES; all misses are featurized in one batched transform"""
+        keys = [self._key(s) for s in smiles]
+        rows = np.empty((len(keys), len(self.feature_names)), dtype=np.float32)
+        missing = {}
+        
+        with self._lock:
+            for i, key in enumerate(keys):
+                row = self._entries.get(key)
+                if row is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                elif key in self._disk_index:
+                    row = np.array(self._disk_rows[self._disk_index[key]])
+                    self._store(key, row)
+                    self.disk_hits += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+                    continue
+                rows[i] = row
+            self.misses += len(missing)
+        
+        if missing:
+            # Raises ValueError for an invalid SMILES, like the extractor
+            computed = self.extractor.transform([smiles for smiles, _ in missing])
+            with self._lock:
+                for (key, positions), row in zip(missing.items(), computed):
+                    row.flags.writeable = False
+                    rows[positions] = row
+                    self._store(key, row)
+                    if self.directory is not None:
+                        self._pending[key] = row
+        
+        return rows
+    
+    def _store(self, key, row: np.ndarray):
+        """Insert under the lock, evicting the least recently used rows"""
+        if self.max_size <= 0:
+            return
+        self._entries[key] = row
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def _path(self, directory: str) -> str:
+        return os.path.join(directory, self.version)
+    
+    def open(self, directory: str):
+        """Attach the on-disk tier for this feature-set version, memory-mapping rows written by earlier runs"""
+        self._load(directory)
+        logger.info(f"📦 Descriptor cache {self.version}: {len(self._disk_index):,} rows on disk in {self._path(directory)}")
+    
+    @contextmanager
+    def _locked(self, path: str, exclusive: bool):
+        """Hold the tier's cross-process lock: shared to read the published build, exclusive to publish one"""
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, '.lock'), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield  # closing the file releases the lock
+    
+    def _read(self, path: str):
+        """Rows and index of the published build; the caller holds the tier lock"""
+        build = path  # tiers written before builds were versioned keep their files at the top level
+        pointer = os.path.join(path, 'CURRENT')
+        if os.path.exists(pointer):
+            with open(pointer, encoding='utf-8') as f:
+                build = os.path.join(path, f.read().strip())
+        if not os.path.exists(os.path.join(build, 'smiles.json')):
+            return None, {}
+        rows = np.load(os.path.join(build, 'features.npy'), mmap_mode='r')
+        with open(os.path.join(build, 'smiles.json'), encoding='utf-8') as f:
+            index = {(smiles, self.version): i for i, smiles in enumerate(json.load(f))}
+        return rows, index
+    
+    def _load(self, directory: str):
+        path = self._path(directory)
+        with self._locked(path, exclusive=False):
+            rows, index = self._read(path)
+        with self._lock:
+            self.directory = directory
+            self._disk_rows, self._disk_index = rows, index
+    
+    def _publish(self, path: str, rows: np.ndarray, smiles: List[str]):
+        """Write a new build and switch CURRENT to it with one os.replace; the caller holds the exclusive lock"""
+        build = tempfile.mkdtemp(prefix='build-', dir=path)
+        with open(os.path.join(build, 'features.npy'), 'wb') as f:
+            np.save(f, rows)
+        with open(os.path.join(build, 'smiles.json'), 'w', encoding='utf-8') as f:
+            json.dump(smiles, f)
+        fd, pointer = tempfile.mkstemp(prefix='.CURRENT.', dir=path)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(os.path.basename(build))
+        os.replace(pointer, os.path.join(path, 'CURRENT'))
+        
+        # Readers take the shared lock, so none is between reading CURRENT and mapping an older build;
+        # processes that already mapped one keep their pages after it is unlinked
+        for name in os.listdir(path):
+            if name.startswith('build-') and name != os.path.basename(build):
+                shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+    
+    def flush(self) -> int:
+        """Merge rows computed since the tier was opened into the on-disk tier; returns the number written"""
+        if self.directory is None:
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            
+            path = self._path(self.directory)
+            try:
+                with self._locked(path, exclusive=True):
+                    # Merge into the latest build so rows published by other processes since we opened it are kept
+                    disk_rows, disk_index = self._read(path)
+                    new = [(key, row) for key, row in pending.items() if key not in disk_index]
+                    if new:
+                        smiles = sorted(disk_index, key=disk_index.get) + [key for key, _ in new]
+                        if disk_rows is None:
+                            disk_rows = np.empty((0, len(self.feature_names)), np.float32)
+                        rows = np.concatenate([disk_rows, np.stack([row for _, row in new])]).astype(np.float32)
+                        self._publish(path, rows, [s for s, _ in smiles])
+                        disk_rows, disk_index = self._read(path)
+            except Exception:
+                with self._lock:
+                    self._pending = {**pending, **self._pending}  # keep the rows for the next flush
+                raise
+            
+            with self._lock:
+                self._disk_rows, self._disk_index = disk_rows, disk_index
+            return len(new)
+    
+    def start_flushing(self, interval: float):
+        """Flush from a daemon thread every interval seconds, keeping disk writes off the request path"""
+        if self.directory is None or self._flusher is not None or interval <= 0:
+            return
+        self._stop_flushing.clear()
+        
+        def run():
+            while not self._stop_flushing.wait(interval):
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.warning(f"⚠️ Descriptor cache flush failed: {e}")
+        
+        self._flusher = threading.Thread(target=run, name='descriptor-cache-flush', daemon=True)
+        self._flusher.start()
+    
+    def stop_flushing(self) -> int:
+        """Stop the background flusher and write the remaining rows; returns the number written"""
+        if self._flusher is not None:
+            self._stop_flushing.set()
+            self._flusher.join()
+            self._flusher = None
+        return self.flush()
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the stats endpoint"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'feature_set': self.version,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'disk_rows': len(self._disk_index),
+                'pending_rows': len(self._pending),
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0
+            }
+
+# Process-wide cache shared by prediction, generation scoring and visualization
+descriptor_cache = DescriptorCache()
+
+FEATURE_STORE_MAGIC = b'CHEMFEAT'
+
+class FeatureStore:
+    """Featurized compound library in a single file, read back with np.memmap
+    
+    Layout: magic, a uint32 header length and a JSON header (feature names, feature set, row and skip counts,
+    section offsets), then the float32 row-major feature matrix, the UTF-8 SMILES of every row back to back,
+    int64 offsets (n_rows + 1) into them, and the int64 input positions of SMILES skipped as invalid. Rows and
+    SMILES stay on disk: blocks are zero-copy views, so a 1M x 1024 library never has to fit in RAM. A store
+    pickles as its path.
+    """
+    
+    def __init__(self, path: str):
+        self.path = str(path)
+        with open(self.path, 'rb') as f:
+            if f.read(len(FEATURE_STORE_MAGIC)) != FEATURE_STORE_MAGIC:
+                raise ValueError(f"{self.path} is not a feature store")
+            header_length = int(np.frombuffer(f.read(4), dtype='<u4')[0])
+            self.header = json.loads(f.read(header_length).decode('utf-8'))
+        
+        n_rows = self.header['n_rows']
+        self.feature_names_ = self.header['feature_names']
+        self.feature_set = self.header['feature_set']
+        self.matrix = self._map('<f4', self.header['data_offset'], (n_rows, len(self.feature_names_)))
+        self.offsets = self._map('<i8', self.header['index_offset'], (n_rows + 1,))
+        self._smiles = self._map(np.uint8, self.header['smiles_offset'], (int(self.offsets[-1]),))
+        self.skipped = self._map('<i8', self.header.get('skipped_offset', 0), (self.header.get('n_skipped', 0),))
+    
+    def _map(self, dtype, offset: int, shape: Tuple[int, ...]) -> np.ndarray:
+        if not np.prod(shape):
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(self.path, dtype=dtype, mode='r', offset=offset, shape=shape)
+    
+    @classmethod
+    def build(cls, path: str, smiles: Iterable[str], extractor: Optional[MolecularFeatureExtractor] = None,
+              block_size: int = 10000) -> 'FeatureStore':
+        """Featurize a library block by block straight into a new store; invalid SMILES are skipped and recorded"""
+        extractor = extractor or MolecularFeatureExtractor()
+        header = {
+            'format': 1,
+            'feature_names': extractor._generate_feature_names(),
+            'feature_set': feature_set_version(extractor.feature_types),
+            'n_rows': 0, 'data_offset': 0, 'smiles_offset': 0, 'index_offset': 0, 'n_skipped': 0, 'skipped_offset': 0
+        }
+        # Room for the final header: only the six numbers change, by at most 20 digits each
+        reserved = len(json.dumps(header).encode('utf-8')) + 120
+        data_offset = -(-(len(FEATURE_STORE_MAGIC) + 4 + reserved) // 64) * 64
+        
+        path = str(path)
+        lengths = [np.zeros(1, dtype=np.int64)]
+        skipped = []
+        n_rows = n_read = 0
+        try:
+            with open(path + '.tmp', 'wb') as f, open(path + '.smiles.tmp', 'wb') as blob:
+                f.seek(data_offset)
+                iterator = iter(smiles)
+                while True:
+                    block = [canonical_smiles(s) for s in itertools.islice(iterator, block_size)]
+                    if not block:
+                        break
+                    valid = []
+                    for position, s in enumerate(block, n_read):
+                        try:
+                            parse_smiles(s)  # cached, so transform() does not parse it again
+                            valid.append(s)
+                        except ValueError:
+                            skipped.append(position)
+                    n_read += len(block)
+                    block = valid
+                    if not block:
+                        continue
+                    f.write(extractor.transform(block).astype('<f4').tobytes())
+                    encoded = [s.encode('utf-8') for s in block]
+                    blob.write(b''.join(encoded))
+                    lengths.append(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)))
+                    n_rows += len(block)
+                
+                blob.flush()
+                header.update(n_rows=n_rows, data_offset=data_offset, smiles_offset=f.tell())
+                with open(path + '.smiles.tmp', 'rb') as written:
+                    shutil.copyfileobj(written, f)
+                header['index_offset'] = -(-f.tell() // 8) * 8
+                f.seek(header['index_offset'])
+                f.write(np.cumsum(np.concatenate(lengths)).astype('<i8').tobytes())
+                header.update(n_skipped=len(skipped), skipped_offset=f.tell())
+                f.write(np.array(skipped, dtype='<i8').tobytes())
+                
+                f.seek(0)
+                f.write(FEATURE_STORE_MAGIC + np.uint32(reserved).tobytes())
+                f.write(json.dumps(header).encode('utf-8').ljust(reserved))
+            os.replace(path + '.tmp', path)
+        finally:
+            for leftover in (path + '.tmp', path + '.smiles.tmp'):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+        
+        if skipped:
+            logger.warning(f"⚠️ Skipped {len(skipped):,} invalid SMILES while building {path}")
+        return cls(path)
+    
+    def __len__(self) -> int:
+        return self.header['n_rows']
+    
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.matrix.shape
+    
+    def rows(self, start: int, stop: int) -> np.ndarray:
+        """Zero-copy view of a row block"""
+        return self.matrix[start:stop]
+    
+    def smiles(self, start: int, stop: int) -> List[str]:
+        """SMILES of a row block, decoded via the offset index"""
+        offsets = self.offsets[start:stop + 1] - self.offsets[start]
+        text = bytes(self._smiles[self.offsets[start]:self.offsets[stop]])
+        return [text[a:b].decode('utf-8') for a, b in zip(offsets[:-1], offsets[1:])]
+    
+    def iter_blocks(self, block_size: int = 10000) -> Iterator[Tuple[int, int, np.ndarray]]:
+        """(start, stop, rows) over the whole store"""
+        for start in range(0, len(self), block_size):
+            stop = min(start + block_size, len(self))
+            yield start, stop, self.rows(start, stop)
+    
+    def __reduce__(self):
+        return (self.__class__, (self.path,))
+
 class EnsembleModelValidator:
     """Advanced model validation for ensemble predictions"""
     
     def __init__(self):
         self.validation_results = {}
         
-    def cross_validate_ensemble(self, models, X, y, cv_folds=5):
-        """Perform cross-validation on ensemble models"""
+    def cross_validate_ensemble(self, models, X, y, cv_folds=5, block_size=None):
+        """Perform cross-validation on ensemble models
+        
+        X may be an array, an np.memmap or a FeatureStore. With block_size, validation folds are predicted
+        block by block and models with partial_fit are trained by streaming row blocks (one pass per fold),
+        so only one block is resident at a time; other models still fit on their gathered training fold.
+        """
         from sklearn.model_selection import KFold
         
+        if isinstance(X, FeatureStore):
+            X = X.matrix
+        
         kf = KFold(n_splits=cv_folds, shuffle=True, random_state=42)
         results = {
             'individual_scores': {i: [] for i in range(len(models))},
@@ -168,15 +1134,22 @@ class EnsembleModelValidator:
         }
         
         for fold, (train_idx, val_idx) in enumerate(kf.split(X)):
-            X_train, X_val = X[train_idx], X[val_idx]
+            X_train = None
             y_train, y_val = y[train_idx], y[val_idx]
             
             fold_predictions = []
             
             # Train and evaluate individual models
             for i, model in enumerate(models):
-                model.fit(X_train, y_train)
-                pred = model.predict(X_val)
+                if block_size and hasattr(model, 'partial_fit'):
+                    model = clone(model)  # partial_fit accumulates, so every fold starts fresh
+                    for rows in self._blocks(train_idx, block_size):
+                        model.partial_fit(X[rows], y[rows])
+                else:
+                    if X_train is None:
+                        X_train = X[train_idx]
+                    model.fit(X_train, y_train)
+                pred = np.concatenate([model.predict(X[rows]) for rows in self._blocks(val_idx, block_size)])
                 score = r2_score(y_val, pred)
                 results['individual_scores'][i].append(score)
                 fold_predictions.append(pred)
@@ -189,6 +1162,13 @@ class EnsembleModelValidator:
         
         return results
     
+    @staticmethod
+    def _blocks(indices: np.ndarray, block_size: Optional[int]) -> Iterator[np.ndarray]:
+        """Index blocks in file order (KFold indices are sorted), or all of them without a block size"""
+        step = block_size or max(1, len(indices))
+        for start in range(0, len(indices), step):
+            yield indices[start:start + step]
+    
     def calculate_prediction_intervals(self, ensemble_predictions, confidence_level=0.95):
         """Calculate prediction intervals for ensemble models"""
         mean_pred = np.mean(ensemble_predictions, axis=0)
@@ -7,9 +7,16 @@ import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Tuple, Any, Optional
 import json
 
+try:
+    from src.ai_models.model_utils import AROMATIC_BOND, MolGraph, descriptor_cache, parse_smiles, smiles_seed
+except ImportError:
+    from ai_models.model_utils import AROMATIC_BOND, MolGraph, descriptor_cache, parse_smiles, smiles_seed
+
+BOND_LENGTH = 1.5  # Angstrom
+
 class MolecularVisualizer:
     """Advanced 3D molecular visualization with professional rendering"""
     
@@ -31,7 +38,8 @@ class MolecularVisualizer:
         """Create professional 3D molecular visualization"""
         
         # Generate 3D coordinates (simplified - in production use RDKit)
-        coords, atoms, bonds = self._generate_3d_structure(smiles)
+        graph, coords = self._generate_3d_structure(smiles)
+        atoms = graph.symbols
         
         fig = go.Figure()
         
@@ -55,8 +63,7 @@ class MolecularVisualizer:
             ))
         
         # Add bonds as lines
-        for bond in bonds:
-            atom1, atom2 = bond
+        for (atom1, atom2), order in zip(graph.bonds.tolist(), graph.orders.tolist()):
             coord1, coord2 = coords[atom1], coords[atom2]
             
             fig.add_trace(go.Scatter3d(
@@ -64,7 +71,7 @@ class MolecularVisualizer:
                 y=[coord1[1], coord2[1]],
                 z=[coord1[2], coord2[2]],
                 mode='lines',
-                line=dict(color='gray', width=8),
+                line=dict(color='gray', width=10 if order == AROMATIC_BOND else 4 + 4 * order),
                 showlegend=False,
                 hoverinfo='skip'
             ))
@@ -188,45 +195,28 @@ class MolecularVisualizer:
         
         return fig
     
-    def _generate_3d_structure(self, smiles: str):
-        """Generate 3D coordinates for molecular structure"""
-        # Simplified 3D structure generation
-        # In production, use RDKit for accurate 3D coordinates
-        
-        np.random.seed(hash(smiles) % 2**32)
-        
-        # Estimate number of atoms from SMILES
-        num_atoms = len([c for c in smiles if c.isupper() or c in 'cnos'])
-        
-        # Generate random 3D coordinates
-        coords = np.random.uniform(-5, 5, (num_atoms, 3))
-        
-        # Generate atom types
-        atoms = []
-        for char in smiles:
-            if char.isupper():
-                atoms.append(char)
-            elif char in 'cnos':
-                atoms.append(char.upper())
-        
-        # Pad with carbon if needed
-        while len(atoms) < num_atoms:
-            atoms.append('C')
-        atoms = atoms[:num_atoms]
-        
-        # Generate bonds (simplified)
-        bonds = []
-        for i in range(num_atoms - 1):
-            bonds.append((i, i + 1))
-        
-        # Add some random bonds for rings
-        if '1' in smiles or 'c' in smiles:
-            for _ in range(min(3, num_atoms // 3)):
-                i, j = np.random.choice(num_atoms, 2, replace=False)
-                if (i, j) not in bonds and (j, i) not in bonds:
-                    bonds.append((i, j))
-        
-        return coords, atoms, bonds
+    def _generate_3d_structure(self, smiles: str, iterations: int = 200) -> Tuple[MolGraph, np.ndarray]:
+        """Parse the molecular graph and lay it out in 3D (simplified - in production use RDKit)"""
+        graph = parse_smiles(smiles.strip())
+        n = graph.n_atoms
+        
+        # Seeded start, then springs pull bonded atoms to BOND_LENGTH while all pairs repel
+        rng = np.random.default_rng(smiles_seed(smiles))
+        coords = rng.uniform(-1, 1, (n, 3)) * max(1.0, n ** (1 / 3)) * BOND_LENGTH
+        first, second = graph.bonds[:, 0], graph.bonds[:, 1]
+        for _ in range(iterations if n > 1 else 0):
+            delta = coords[:, np.newaxis, :] - coords[np.newaxis, :, :]
+            distance = np.linalg.norm(delta, axis=2) + np.eye(n)
+            force = (delta / distance[:, :, np.newaxis] ** 3).sum(axis=1) * 0.1 * BOND_LENGTH ** 2
+            
+            stretch = coords[second] - coords[first]
+            length = np.linalg.norm(stretch, axis=1, keepdims=True) + 1e-9
+            spring = stretch * (1 - BOND_LENGTH / length)
+            np.add.at(force, first, spring)
+            np.add.at(force, second, -spring)
+            coords += 0.1 * np.clip(force, -BOND_LENGTH, BOND_LENGTH)
+        
+        return graph, coords - coords.mean(axis=0)
     
     def _get_atomic_radius(self, atom_type: str) -> float:
         """Get atomic radius for visualization"""
@@ -279,16 +269,13 @@ class PropertyTrendAnalyzer:
     def analyze_sar_trends(self, molecules: List[Dict], property_name: str) -> go.Figure:
         """Structure-Activity Relationship trend analysis"""
         
-        # Extract molecular weights and target property
-        mol_weights = []
+        # Extract molecular weights (from the shared descriptor cache) and target property
+        descriptors = descriptor_cache.get_many([mol['smiles'] for mol in molecules])
+        mol_weights = descriptors[:, descriptor_cache.feature_names.index('molecular_weight')].tolist()
         property_values = []
         names = []
         
         for mol in molecules:
-            # Estimate molecular weight from SMILES length (simplified)
-            mw = len(mol['smiles']) * 12
-            mol_weights.append(mw)
-            
             prop_val = mol['predicted_properties'].get(property_name, 0)
             if isinstance(prop_val, dict):
                 prop_val = prop_val.get('value', 0)
@@ -0,0 +1,302 @@
+"""
+Load Testing for ChemAI Discovery
+Starts the app under uvicorn on a local port and drives it with concurrent asyncio clients
+
+Usage:
+    python tests/load_test.py --workers 1 2 4 --concurrency 32 --duration 20
+    python tests/load_test.py --mix analyze=80,stats=20 --url http://staging:8000
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import subprocess
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+PROJECT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+DEFAULT_MIX = "analyze=70,generate=10,stats=20"
+SCAFFOLDS = ["c1ccccc1", "c1ccncc1", "C1CCNCC1", "c1ccc2ccccc2c1", "CC(=O)Oc1ccccc1C(=O)O", "CCN(CC)CC"]
+SUBSTITUENTS = ["C", "O", "N", "F", "Cl", "C(=O)O", "C#N", "OC", "N(C)C"]
+
+# Request paths for the advanced app and for the single-file app
+ROUTES = {
+    "advanced": {
+        "analyze": ("POST", "/api/v2/analyze-molecule"),
+        "generate": ("POST", "/api/v2/generate-molecules"),
+        "stats": ("GET", "/api/v2/stats")
+    },
+    "single-file": {
+        "analyze": ("POST", "/api/analyze"),
+        "generate": ("POST", "/api/generate"),
+        "stats": ("GET", "/api/stats")
+    }
+}
+
+class HTTPConnection:
+    """Minimal keep-alive HTTP/1.1 client on asyncio streams, so the load generator stays cheap"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, path: str, body: Any = None) -> Tuple[int, bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\nContent-Length: {len(payload)}\r\n"
+        if body is not None:
+            head += "Content-Type: application/json\r\n"
+        self.writer.write(head.encode("latin-1") + b"\r\n" + payload)
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("server closed the connection")
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if "content-length" in headers:
+            content = await self.reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            content = await self._read_chunked()
+        else:
+            content = await self.reader.read()
+            self.close()
+
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, content
+
+    async def _read_chunked(self) -> bytes:
+        chunks = []
+        while True:
+            size = int((await self.reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                await self.reader.readline()
+                return b"".join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readline()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """'analyze=70,stats=30' -> normalized weights"""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ROUTES["advanced"]:
+            raise ValueError(f"Unknown request type {name!r} (choose from {', '.join(ROUTES['advanced'])})")
+        weights[name] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Request mix weights must add up to more than zero")
+    return {name: weight / total for name, weight in weights.items()}
+
+def make_smiles_pool(size: int, seed: int = 0) -> List[str]:
+    """Distinct synthetic SMILES, so analyze requests aren't all prediction-cache hits"""
+    rng = random.Random(seed)
+    return [rng.choice(SCAFFOLDS) + "".join(rng.choices(SUBSTITUENTS, k=rng.randint(0, 4))) for _ in range(size)]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class AppServer:
+    """The app under uvicorn in a subprocess with N worker processes"""
+
+    def __init__(self, workers: int, host: str = "127.0.0.1", port: Optional[int] = None, app: str = "src.main:app",
+                 env: Optional[Dict[str, str]] = None):
+        self.workers = workers
+        self.host = host
+        self.port = port or free_port()
+        self.app = app
+        self.env = env  # overrides on top of os.environ, e.g. MODEL_DIR
+        self.process: Optional[subprocess.Popen] = None
+
+    def start(self, timeout: float = 120.0):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", self.app, "--host", self.host, "--port", str(self.port),
+             "--workers", str(self.workers), "--log-level", "warning", "--no-access-log"],
+            cwd=PROJECT_ROOT,
+            env=dict(os.environ, **self.env) if self.env else None
+        )
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {self.process.returncode}")
+            try:
+                status, _ = asyncio.run(HTTPConnection(self.host, self.port).request("GET", "/health"))
+                if status == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.25)
+        self.stop()
+        raise TimeoutError(f"App not healthy after {timeout:.0f}s")
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+
+async def detect_routes(host: str, port: int) -> str:
+    """Which API the server speaks: the advanced /api/v2 app or the single-file app"""
+    connection = HTTPConnection(host, port)
+    try:
+        status, _ = await connection.request("GET", ROUTES["advanced"]["stats"][1])
+    finally:
+        connection.close()
+    return "advanced" if status == 200 else "single-file"
+
+async def run_load(host: str, port: int, concurrency: int, duration: float, mix: Dict[str, float],
+                   warmup: float = 2.0, smiles_pool: int = 5000, seed: int = 0) -> Dict[str, Any]:
+    """Closed-loop load: each virtual user sends its next request as soon as the last one completes"""
+    routes = ROUTES[await detect_routes(host, port)]
+    pool = make_smiles_pool(smiles_pool, seed)
+    names, weights = list(mix), list(mix.values())
+    samples = {name: [] for name in names}  # (latency ns, status) per request type, after warmup
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    measure_from, stop_at = start + warmup, start + warmup + duration
+
+    def body(name: str, rng: random.Random):
+        if name == "analyze":
+            return {"smiles": rng.choice(pool)}
+        if name == "generate":
+            return {"target_properties": {"solubility": -2.0, "bioavailability": 70.0}, "count": 5}
+        return None
+
+    async def user(user_id: int):
+        rng = random.Random(seed * 100003 + user_id)
+        connection = HTTPConnection(host, port)
+        try:
+            while loop.time() < stop_at:
+                name = rng.choices(names, weights)[0]
+                method, path = routes[name]
+                sent_at = loop.time()
+                started = time.perf_counter_ns()
+                try:
+                    status, _ = await connection.request(method, path, body(name, rng))
+                except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+                    status = 0  # connection-level failure
+                    connection.close()
+                if sent_at >= measure_from:
+                    samples[name].append((time.perf_counter_ns() - started, status))
+        finally:
+            connection.close()
+
+    await asyncio.gather(*(user(i) for i in range(concurrency)))
+    return summarize_load(samples, duration, concurrency)
+
+def summarize_load(samples: Dict[str, List[Tuple[int, int]]], duration: float, concurrency: int) -> Dict[str, Any]:
+    """Throughput, error rate and latency percentiles per request type and overall"""
+    def stats(records: List[Tuple[int, int]]) -> Dict[str, Any]:
+        if not records:
+            return {"requests": 0, "errors": 0, "error_rate": 0.0, "throughput_rps": 0.0}
+        latencies = np.array([latency for latency, _ in records], dtype=np.float64) / 1e6
+        errors = sum(1 for _, status in records if not 200 <= status < 300)
+        p50, p90, p95, p99 = np.percentile(latencies, [50, 90, 95, 99])
+        return {
+            "requests": len(records),
+            "errors": errors,
+            "error_rate": errors / len(records),
+            "throughput_rps": len(records) / duration,
+            "mean_ms": float(latencies.mean()),
+            "p50_ms": float(p50),
+            "p90_ms": float(p90),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(latencies.max())
+        }
+
+    return {
+        "concurrency": concurrency,
+        "duration_s": duration,
+        "endpoints": {name: stats(records) for name, records in samples.items()},
+        "total": stats([record for records in samples.values() for record in records])
+    }
+
+def print_report(label: str, report: Dict[str, Any]):
+    print(f"\n👥 {label}  concurrency={report['concurrency']}  duration={report['duration_s']:.0f}s")
+    print(f"  {'request':<10} {'count':>8} {'errors':>7} {'err %':>6} {'req/s':>9} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    rows = list(report["endpoints"].items()) + [("total", report["total"])]
+    for name, row in rows:
+        if not row["requests"]:
+            continue
+        print(f"  {name:<10} {row['requests']:>8,} {row['errors']:>7,} {row['error_rate']:>6.1%} "
+              f"{row['throughput_rps']:>9.1f} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} "
+              f"{row['p99_ms']:>9.2f} {row['max_ms']:>9.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test ChemAI Discovery under uvicorn")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="uvicorn worker counts to compare")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds per run")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds before each run")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Request mix as name=weight pairs (default {DEFAULT_MIX})")
+    parser.add_argument("--smiles-pool", type=int, default=5000, help="Distinct SMILES sent to analyze")
+    parser.add_argument("--url", help="Test an already running server instead of starting one (e.g. http://host:8000)")
+    parser.add_argument("--app", default="src.main:app", help="ASGI app to start under uvicorn")
+    parser.add_argument("--startup-timeout", type=float, default=120.0, help="Seconds to wait for /health")
+    parser.add_argument("--output", help="Write all reports to this JSON file")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    reports = {}
+    print(f"⚡ ChemAI Discovery load test ({os.cpu_count()} CPUs, mix {args.mix})")
+
+    if args.url:
+        host, _, port = args.url.split("://", 1)[-1].rstrip("/").partition(":")
+        report = asyncio.run(run_load(host, int(port or 80), args.concurrency, args.duration, mix,
+                                      args.warmup, args.smiles_pool))
+        reports[args.url] = report
+        print_report(args.url, report)
+    else:
+        for workers in args.workers:
+            server = AppServer(workers, app=args.app)
+            print(f"\n🚀 Starting uvicorn with {workers} worker(s) on port {server.port}...")
+            server.start(args.startup_timeout)
+            try:
+                report = asyncio.run(run_load(server.host, server.port, args.concurrency, args.duration, mix,
+                                              args.warmup, args.smiles_pool))
+            finally:
+                server.stop()
+            reports[f"workers={workers}"] = {"workers": workers, **report}
+            print_report(f"workers={workers}", report)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+        print(f"\n💾 Reports written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Tests for the advanced platform build of src/main.py
+Streaming metrics, inference batching and model artifacts; skipped when src/main.py is the professional platform
+"""
+
+import pytest
+import asyncio
+import numpy as np
+from src import main
+
+if not hasattr(main, "ModelArtifactStore"):
+    pytest.skip("src/main.py is the professional platform", allow_module_level=True)
+
+class TestRollingMetrics:
+    """Test the t-digest quantiles and the recent-sample ring buffer"""
+    
+    @pytest.mark.parametrize("distribution", ["lognormal", "uniform", "exponential"])
+    def test_tdigest_quantiles_match_numpy(self, distribution):
+        """Estimates stay within a small rank error of np.quantile, tightest in the tails"""
+        from src.main import TDigest
+        
+        data = getattr(np.random.default_rng(7), distribution)(size=50000)
+        digest = TDigest(compression=100)
+        for value in data:
+            digest.add(float(value))
+        
+        for q, tolerance in ((0.001, 0.001), (0.01, 0.002), (0.5, 0.005), (0.99, 0.002), (0.999, 0.001)):
+            estimate = digest.quantiles([q])[0]
+            assert np.quantile(data, max(q - tolerance, 0)) <= estimate <= np.quantile(data, min(q + tolerance, 1))
+        assert digest.quantiles([0, 1]) == [data.min(), data.max()]
+        assert len(digest.means) <= 100
+    
+    def test_ring_buffer_keeps_only_recent_samples(self):
+        """Old samples leave the recent window but still count in the all-time statistics"""
+        from src.main import RollingStats
+        
+        stats = RollingStats(window=4)
+        for value in range(1, 11):
+            stats.add(float(value))
+        
+        summary = stats.summary()
+        assert (summary["count"], summary["mean"], summary["min"], summary["max"]) == (10, 5.5, 1.0, 10.0)
+        assert sorted(stats.recent.tolist()) == [7.0, 8.0, 9.0, 10.0]
+        assert summary["recent"]["samples"] == 4
+        assert summary["recent"]["mean"] == 8.5 and summary["recent"]["p50"] == 8.5
+        assert len(stats) == 10 and RollingStats(window=4).summary() == {"count": 0}
+
+class TestInferenceBatching:
+    """Test the micro-batcher's concurrent dispatch and the worker pool's admission control"""
+    
+    @pytest.fixture
+    def slow_pool(self, monkeypatch):
+        """A two-worker thread pool whose batched prediction echoes each row's id after a short delay"""
+        import threading
+        import time
+        from types import SimpleNamespace
+        from src import main
+        
+        calls = {"active": 0, "peak": 0, "sizes": []}
+        lock = threading.Lock()
+        
+        def predict_batch(features):
+            with lock:
+                calls["active"] += 1
+                calls["peak"] = max(calls["peak"], calls["active"])
+                calls["sizes"].append(len(features))
+            time.sleep(0.05)
+            with lock:
+                calls["active"] -= 1
+            return [{"id": int(row[0])} for row in features], {"predict": 0.05}
+        
+        pool = main.InferencePool(kind="thread", max_workers=2, max_pending=4)
+        pool.start(SimpleNamespace(model_source="fitted"))
+        monkeypatch.setattr(main, "inference_pool", pool)
+        monkeypatch.setattr(main, "_predict_batch", predict_batch)
+        yield pool, calls
+        pool.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_batches_fan_out_in_order_and_run_concurrently(self, slow_pool):
+        """Every caller gets its own row back while up to one batch per worker is in flight"""
+        from types import SimpleNamespace
+        from src.main import PredictionBatcher
+        
+        _, calls = slow_pool
+        batcher = PredictionBatcher(SimpleNamespace(batcher=None), max_batch_size=4, max_wait_ms=20)
+        await batcher.start()
+        try:
+            results = await asyncio.gather(*(batcher.submit(np.array([[i, 0.0]])) for i in range(10)))
+        finally:
+            await batcher.stop()
+        
+        assert [result["id"] for result, _ in results] == list(range(10))
+        assert all(stages == {"predict": 0.05} for _, stages in results)
+        assert sorted(calls["sizes"], reverse=True) == [4, 4, 2]
+        assert calls["peak"] == 2 and batcher.stats["peak_in_flight"] == 2
+        assert batcher.summary()["batches"] == 3 and batcher.summary()["molecules"] == 10
+    
+    @pytest.mark.asyncio
+    async def test_partial_batch_flushes_after_max_wait(self, slow_pool):
+        """A lone request is not held for a full batch: it goes out once max-wait has elapsed"""
+        import time
+        from types import SimpleNamespace
+        from src.main import PredictionBatcher
+        
+        batcher = PredictionBatcher(SimpleNamespace(batcher=None), max_batch_size=32, max_wait_ms=30)
+        await batcher.start()
+        try:
+            start = time.perf_counter()
+            result, _ = await batcher.submit(np.array([[7, 0.0]]))
+            elapsed = time.perf_counter() - start
+        finally:
+            await batcher.stop()
+        
+        assert result == {"id": 7}
+        assert 0.03 <= elapsed < 0.5
+        assert batcher.stats["largest_batch"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_saturated_pool_returns_503_with_retry_after(self, slow_pool):
+        """Requests past max_pending are rejected at once instead of queueing"""
+        from fastapi import HTTPException
+        from src.main import config
+        
+        pool, _ = slow_pool
+        admitted = []
+        for _ in range(pool.max_pending):
+            slot = pool.admit()
+            await slot.__aenter__()
+            admitted.append(slot)
+        
+        with pytest.raises(HTTPException) as error:
+            async with pool.admit():
+                pass
+        assert error.value.status_code == 503
+        assert error.value.headers["Retry-After"] == str(config.INFERENCE_RETRY_AFTER)
+        assert pool.summary()["rejected"] == 1 and pool.summary()["pending"] == pool.max_pending
+        
+        for slot in admitted:
+            await slot.__aexit__(None, None, None)
+        async with pool.admit():
+            assert pool.pending == 1
+
+class TestModelArtifactStore:
+    """Test the versioned artifact builds behind the CURRENT pointer"""
+    
+    @staticmethod
+    def fitted(seed):
+        """A one-member ensemble and its scaler, fitted on seeded data"""
+        from sklearn.linear_model import Ridge
+        from sklearn.preprocessing import StandardScaler
+        
+        rng = np.random.default_rng(seed)
+        X, y = rng.normal(size=(20, 4)), rng.normal(size=20)
+        scaler = StandardScaler().fit(X)
+        return {"toxicity": [Ridge().fit(scaler.transform(X), y)]}, {"toxicity": scaler}
+    
+    def test_save_load_round_trip(self, tmp_path):
+        """Loaded ensembles predict exactly like the saved ones and the manifest describes them"""
+        from src.main import ModelArtifactStore
+        
+        store = ModelArtifactStore(str(tmp_path))
+        models, scalers = self.fitted(0)
+        assert not store.exists("v1")
+        store.save("v1", models, scalers, metadata={"n_samples": 20})
+        
+        loaded, loaded_scalers, manifest = store.load("v1")
+        X = np.random.default_rng(1).normal(size=(5, 4))
+        np.testing.assert_array_equal(loaded["toxicity"][0].predict(loaded_scalers["toxicity"].transform(X)),
+                                      models["toxicity"][0].predict(scalers["toxicity"].transform(X)))
+        assert manifest["version"] == "v1" and manifest["metadata"] == {"n_samples": 20}
+        assert manifest["properties"]["toxicity"]["estimators"] == ["Ridge"]
+        assert store.exists("v1") and store.available_versions() == ["v1"]
+    
+    def test_save_switches_the_pointer(self, tmp_path):
+        """Each save publishes a new build through CURRENT and leaves no staging files behind"""
+        from src.main import ModelArtifactStore
+        
+        store = ModelArtifactStore(str(tmp_path))
+        first = store.save("v1", *self.fitted(0))
+        second = store.save("v1", *self.fitted(1))
+        
+        assert first != second
+        assert (tmp_path / "v1" / "CURRENT").read_text(encoding="utf-8") == second.name
+        assert store.version_dir("v1") == second
+        np.testing.assert_array_equal(store.load("v1")[0]["toxicity"][0].coef_, self.fitted(1)[0]["toxicity"][0].coef_)
+        assert not list((tmp_path / "v1").glob(".*"))
+    
+    def test_pruning_never_removes_the_current_build(self, tmp_path):
+        """Only the newest KEEP_BUILDS builds stay, and the current one survives even if it sorts first"""
+        from src.main import ModelArtifactStore
+        
+        store = ModelArtifactStore(str(tmp_path))
+        builds = [store.save("v1", *self.fitted(seed)) for seed in range(4)]
+        assert sorted(path for path in (tmp_path / "v1").iterdir() if path.is_dir()) == builds[-store.KEEP_BUILDS:]
+        
+        # Builds named later than the next save (e.g. written under a clock that ran ahead)
+        for name in ("99999999999999999998-ahead", "99999999999999999999-ahead"):
+            (tmp_path / "v1" / name).mkdir()
+        current = store.save("v1", *self.fitted(4))
+        assert current.exists() and store.version_dir("v1") == current
+        assert not builds[-1].exists()
+        assert store.load("v1")[2]["version"] == "v1"
+    
+    def test_legacy_layout_loads(self, tmp_path):
+        """A version directory without CURRENT (written before builds existed) still loads"""
+        from src.main import ModelArtifactStore
+        
+        store = ModelArtifactStore(str(tmp_path))
+        build = store.save("v1", *self.fitted(0))
+        for path in build.iterdir():
+            path.rename(tmp_path / "v1" / path.name)
+        build.rmdir()
+        (tmp_path / "v1" / "CURRENT").unlink()
+        
+        assert store.version_dir("v1") == tmp_path / "v1"
+        assert store.exists("v1") and store.available_versions() == ["v1"]
+        models, scalers, _ = store.load("v1")
+        np.testing.assert_array_equal(models["toxicity"][0].coef_, self.fitted(0)[0]["toxicity"][0].coef_)
+        assert scalers["toxicity"].n_features_in_ == 4
+    
+    @pytest.mark.asyncio
+    async def test_fallback_training_is_saved(self, tmp_path, monkeypatch):
+        """Models trained at startup because no artifacts existed are persisted for the next boot"""
+        from src.main import AdvancedMolecularAI, ModelArtifactStore, config
+        
+        async def train(scheduler=None):
+            ai.models, ai.scalers = self.fitted(0)
+            ai.model_source = "trained"
+        
+        monkeypatch.setattr(config, "TRAIN_ON_STARTUP", True)
+        ai = AdvancedMolecularAI(ModelArtifactStore(str(tmp_path)))
+        monkeypatch.setattr(ai, "train", train)
+        await ai.initialize()
+        
+        restarted = AdvancedMolecularAI(ModelArtifactStore(str(tmp_path)))
+        await restarted.initialize()
+        assert restarted.model_source == "artifacts"
+        assert restarted.model_version == config.MODEL_VERSION
+        np.testing.assert_array_equal(restarted.models["toxicity"][0].coef_, ai.models["toxicity"][0].coef_)
+
+class TestTrainingScheduler:
+    """Test the process-pool training of ensemble members"""
+    
+    @pytest.mark.asyncio
+    async def test_every_member_is_trained_and_reported(self):
+        """Each property gets a complete ensemble and scaler, with one report entry per member"""
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.linear_model import Ridge
+        from src.main import TrainingScheduler
+        
+        model_configs = {name: {"ensemble": [Ridge(), RandomForestRegressor(n_estimators=5, random_state=42)],
+                                "feature_count": 1024} for name in ("solubility", "toxicity", "binding_affinity")}
+        scheduler = TrainingScheduler(max_workers=2, n_jobs=1, n_samples=40, seed=3)
+        models, scalers = await scheduler.train(model_configs)
+        
+        assert set(models) == set(scalers) == set(model_configs)
+        for name, ensemble in models.items():
+            assert [type(model).__name__ for model in ensemble] == ["Ridge", "RandomForestRegressor"]
+            assert ensemble[0].coef_.shape == (1024,) and ensemble[1].n_features_in_ == 1024
+            assert scalers[name].n_samples_seen_ == 40
+        assert model_configs["toxicity"]["ensemble"][1].get_params()["n_jobs"] == 1
+        
+        assert len(scheduler.report) == 6
+        assert sorted((entry["property"], entry["index"]) for entry in scheduler.report) == \
+            sorted((name, index) for name in model_configs for index in range(2))
+        assert all(entry["wall_time"] >= 0 for entry in scheduler.report)
+        
+        # Members regenerate their property's data from the seed, so a rerun fits the same models
+        rerun, _ = await TrainingScheduler(max_workers=1, n_samples=40, seed=3).train(model_configs)
+        np.testing.assert_array_equal(rerun["toxicity"][0].coef_, models["toxicity"][0].coef_)
@@ -0,0 +1,218 @@
+"""
+Tests for the shared model utilities
+Parser, molecular graph batches, descriptors, descriptor cache and feature store
+"""
+
+import pytest
+import numpy as np
+
+class TestBatchedFeatureExtraction:
+    """Test the vectorized MolecularFeatureExtractor.transform path"""
+
+    def test_batch_rows_match_single_molecules(self):
+        """Rows don't depend on batch composition, chunking or n_jobs"""
+        from src.ai_models.model_utils import MolecularFeatureExtractor
+
+        sample_molecules = ["CCO", "CC(=O)O", "c1ccccc1", "CCN(CC)CC", "CC(C)(C)c1ccc(O)cc1"]
+        extractor = MolecularFeatureExtractor(chunk_size=2)
+        features = extractor.transform(sample_molecules)
+        assert features.dtype == np.float32
+        assert features.shape == (len(sample_molecules), len(extractor._generate_feature_names()))
+
+        for smiles, row in zip(sample_molecules, features):
+            np.testing.assert_array_equal(row, extractor._extract_molecular_features(smiles))
+        parallel = MolecularFeatureExtractor(n_jobs=3, chunk_size=2).transform(sample_molecules)
+        np.testing.assert_array_equal(parallel, features)
+
+    def test_graph_descriptors(self):
+        """Constitutional descriptors come from the parsed graph, not character counts"""
+        from src.ai_models.model_utils import MolecularFeatureExtractor
+
+        extractor = MolecularFeatureExtractor(feature_types=['constitutional'])
+        names = extractor._generate_feature_names()
+        expected = {
+            "CC(=O)OC1=CC=CC=C1C(=O)O": {"molecular_weight": 180.16, "atom_count": 13, "ring_count": 1,
+                                         "aromatic_count": 0, "heteroatom_count": 4, "rotatable_bonds": 3},
+            "c1ccccc1": {"molecular_weight": 78.11, "atom_count": 6, "bond_count": 6, "aromatic_count": 6},
+            "ClCCl": {"molecular_weight": 84.93, "atom_count": 3, "heteroatom_count": 2, "hydrogen_acceptors": 0},
+            "[NH4+].[Cl-]": {"atom_count": 2, "bond_count": 0, "ring_count": 0, "hydrogen_donors": 1, "formal_charge": 0}
+        }
+        features = extractor.transform(list(expected))
+
+        for row, descriptors in zip(features, expected.values()):
+            for name, value in descriptors.items():
+                assert row[names.index(name)] == pytest.approx(value, abs=0.01), name
+
+class TestMolGraphBatch:
+    """Test the array-backed molecular graph layout"""
+
+    def test_csr_adjacency(self):
+        """Each atom's neighbors are a slice of one int32 array"""
+        from src.ai_models.model_utils import parse_smiles
+
+        phenol = parse_smiles("c1ccccc1O")
+        assert phenol.offsets.dtype == np.int32 and phenol.neighbors.dtype == np.int32
+        assert phenol.degrees.tolist() == [2, 2, 2, 2, 2, 3, 1]
+        assert sorted(phenol.neighbors_of(5).tolist()) == [0, 4, 6]
+        assert phenol.symbols[-1] == "O"
+
+    def test_views_share_the_batch_arrays(self, tmp_path):
+        """Molecules are views into the batch; a memory-mapped batch pickles as its path"""
+        import pickle
+        from src.ai_models.model_utils import MolGraphBatch, parse_smiles
+
+        library = ["CCO", "c1ccccc1", "[Na+].[Cl-]"] * 2
+        batch = MolGraphBatch.from_smiles(library, chunk_size=4)
+        assert len(batch) == 6
+        for i, smiles in enumerate(library):
+            graph, expected = batch[i], parse_smiles(smiles)
+            assert np.shares_memory(graph.atoms, batch.atoms)
+            assert graph.atoms.tolist() == expected.atoms.tolist()
+            assert graph.neighbors.tolist() == expected.neighbors.tolist()
+            assert graph.ring_count == expected.ring_count
+        assert batch.nbytes / batch.atom_index[-1] < 64
+
+        mapped = MolGraphBatch.load(batch.save(str(tmp_path / "library")))
+        assert len(pickle.dumps(mapped)) < 512
+        restored = pickle.loads(pickle.dumps(mapped))
+        assert isinstance(restored.atoms, np.memmap)
+        assert restored[4].neighbors.tolist() == batch[4].neighbors.tolist()
+
+class TestTopologicalDescriptors:
+    """Test the distance- and degree-based indices against hand-computed values"""
+
+    @pytest.mark.parametrize("smiles,expected", [
+        ("CC(C)C", {"wiener_index": 9, "zagreb_index": 12, "randic_index": 3 ** 0.5,
+                    "balaban_index": 3 / 15 ** 0.5 * 3, "diameter": 2, "radius": 1, "petitjean_index": 1}),
+        ("c1ccccc1", {"wiener_index": 27, "zagreb_index": 24, "randic_index": 3,
+                      "balaban_index": 2, "diameter": 3, "radius": 3, "eccentricity": 3}),
+        ("CCO", {"kier_hall_index": 2 ** -0.5 + 10 ** -0.5, "connectivity_index": 2 + 2 ** -0.5}),
+        ("C1CC1.CC", {"wiener_index": 4, "diameter": 1, "balaban_index": 5}),
+    ])
+    def test_known_values(self, smiles, expected):
+        """Indices are computed from the hydrogen-suppressed graph, fragment by fragment"""
+        from src.ai_models.model_utils import MolecularFeatureExtractor
+
+        extractor = MolecularFeatureExtractor(feature_types=["topological"]).fit(None)
+        row = dict(zip(extractor.feature_names_, extractor.transform([smiles])[0]))
+        for name, value in expected.items():
+            assert row[name] == pytest.approx(value, rel=1e-5), name
+
+    def test_size_buckets_do_not_change_rows(self):
+        """Padding molecules to a shared size leaves their descriptors unchanged"""
+        from src.ai_models.model_utils import MolecularFeatureExtractor, MolGraphBatch
+
+        library = ["CC(=O)Oc1ccccc1C(=O)O", "CCO", "C1CCC2CCCCC2C1", "CC(C)Cc1ccc(cc1)C(C)C(=O)O"]
+        extractor = MolecularFeatureExtractor(feature_types=["topological"])
+        batch = MolGraphBatch.from_smiles(library)
+        padded = np.column_stack(extractor._calculate_topological_descriptors(batch, bucket=32))
+        assert np.allclose(np.column_stack(extractor._calculate_topological_descriptors(batch, bucket=1)), padded)
+
+class TestDescriptorCache:
+    """Test the shared descriptor cache and its on-disk tier"""
+
+    def test_rows_are_featurized_once(self):
+        """Repeats and whitespace variants are served from the LRU; misses share one transform"""
+        from src.ai_models.model_utils import DescriptorCache, MolecularFeatureExtractor
+
+        cache = DescriptorCache(max_size=2)
+        rows = cache.get_many(["CCO", " CCO ", "c1ccccc1"])
+        assert np.array_equal(rows[0], rows[1])
+        assert np.allclose(rows, MolecularFeatureExtractor().transform(["CCO", "CCO", "c1ccccc1"]))
+        assert cache.stats()["misses"] == 2
+
+        assert cache.descriptors("CCO")["atom_count"] == 3
+        cache.get("CCN")
+        stats = cache.stats()
+        assert (stats["hits"], stats["size"], stats["evictions"]) == (1, 2, 1)
+
+    def test_disk_tier_survives_restarts(self, tmp_path):
+        """Flushed rows are memory-mapped by the next cache; other feature sets do not see them"""
+        from src.ai_models.model_utils import DescriptorCache, MolecularFeatureExtractor
+
+        first = DescriptorCache(directory=str(tmp_path))
+        expected = first.get_many(["CCO", "c1ccccc1"])
+        assert first.flush() == 2
+
+        second = DescriptorCache(directory=str(tmp_path))
+        assert np.array_equal(second.get_many(["CCO", "c1ccccc1"]), expected)
+        assert (second.stats()["disk_hits"], second.stats()["misses"]) == (2, 0)
+
+        topological = DescriptorCache(MolecularFeatureExtractor(feature_types=["topological"]), directory=str(tmp_path))
+        assert topological.stats()["disk_rows"] == 0
+
+    def test_concurrent_flushes_keep_every_row(self, tmp_path):
+        """Writers flushing at once each merge the latest build; requests never write to disk"""
+        import threading
+        from src.ai_models.model_utils import DescriptorCache
+
+        smiles = ["C" * n for n in range(1, 9)] + ["c1ccccc1", "CCO", "CC(=O)O", "CCN"]
+        caches = [DescriptorCache(max_size=1, directory=str(tmp_path)) for _ in range(4)]
+        for i, cache in enumerate(caches):
+            cache.get_many(smiles[i::4])
+        assert not list((tmp_path / caches[0].version).glob("build-*"))
+
+        threads = [threading.Thread(target=cache.flush) for cache in caches]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        merged = DescriptorCache(directory=str(tmp_path))
+        assert merged.stats()["disk_rows"] == len(smiles)
+        assert np.array_equal(merged.get_many(smiles), DescriptorCache().get_many(smiles))
+        assert len(list((tmp_path / merged.version).glob("build-*"))) == 1
+
+class TestFeatureStore:
+    """Test the memory-mapped feature matrix store"""
+
+    def test_build_and_memory_map(self, tmp_path):
+        """Rows, feature names and SMILES come back from the file without loading it"""
+        import pickle
+        from src.ai_models.model_utils import FeatureStore, MolecularFeatureExtractor
+
+        library = ["CCO", "c1ccccc1", "CC(=O)Oc1ccccc1C(=O)O", "CCN(CC)CC", "O=C1CCCN1"]
+        store = FeatureStore.build(str(tmp_path / "library.features"), iter(library), block_size=2)
+        extractor = MolecularFeatureExtractor().fit(library)
+
+        assert store.shape == (5, len(extractor.feature_names_))
+        assert store.feature_names_ == extractor.feature_names_
+        assert isinstance(store.matrix, np.memmap) and store.matrix.dtype == np.float32
+        assert np.array_equal(store.rows(0, 5), extractor.transform(library))
+        assert store.smiles(1, 4) == library[1:4]
+        assert [stop for _, stop, _ in store.iter_blocks(2)] == [2, 4, 5]
+
+        restored = pickle.loads(pickle.dumps(store))
+        assert len(pickle.dumps(store)) < 512
+        assert np.array_equal(restored.matrix, store.matrix)
+
+    def test_invalid_smiles_are_skipped_and_recorded(self, tmp_path):
+        """Invalid SMILES are left out of the rows and their input positions kept in the store"""
+        from src.ai_models.model_utils import FeatureStore, MolecularFeatureExtractor
+
+        library = ["CCO", "C1CC", "CCN", "c1ccccc1", "C(C", "xyz", "CC(=O)O"]
+        store = FeatureStore.build(str(tmp_path / "library.features"), library, block_size=2)
+        valid = ["CCO", "CCN", "c1ccccc1", "CC(=O)O"]
+
+        assert len(store) == 4 and store.smiles(0, 4) == valid
+        assert store.skipped.tolist() == [1, 4, 5] and store.header["n_skipped"] == 3
+        assert np.array_equal(store.rows(0, 4), MolecularFeatureExtractor().transform(valid))
+        assert [path.name for path in tmp_path.iterdir()] == ["library.features"]
+
+    def test_cross_validation_streams_blocks(self, tmp_path):
+        """Blocked validation matches whole-fold validation; partial_fit models learn from streamed blocks"""
+        from sklearn.linear_model import Ridge, SGDRegressor
+        from src.ai_models.model_utils import EnsembleModelValidator
+
+        rng = np.random.default_rng(0)
+        np.save(tmp_path / "X.npy", rng.normal(size=(600, 8)).astype(np.float32))
+        X = np.load(tmp_path / "X.npy", mmap_mode="r")
+        y = X @ np.arange(1, 9) + rng.normal(0, 0.1, 600)
+
+        validator = EnsembleModelValidator()
+        whole = validator.cross_validate_ensemble([Ridge()], X, y, cv_folds=3)
+        blocked = validator.cross_validate_ensemble([Ridge()], X, y, cv_folds=3, block_size=64)
+        assert np.allclose(whole["ensemble_scores"], blocked["ensemble_scores"])
+
+        streamed = validator.cross_validate_ensemble([SGDRegressor(random_state=0)], X, y, cv_folds=3, block_size=64)
+        assert min(streamed["ensemble_scores"]) > 0.9
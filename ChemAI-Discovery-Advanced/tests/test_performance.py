@@ -1,194 +1,143 @@
 """
-Performance and Load Testing for ChemAI Discovery
+Performance Benchmarks for ChemAI Discovery
+Runs the scripts/benchmark.py harness and a short tests/load_test.py run; `make benchmark` and `make load-test` run the full versions
 """
 
-import pytest
-import time
+import os
+import sys
 import asyncio
-import concurrent.futures
-from fastapi.testclient import TestClient
-from src.main import app
-
-client = TestClient(app)
-
-class TestPerformanceBenchmarks:
-    """Performance benchmark tests"""
-    
-    def test_single_analysis_performance(self):
-        """Benchmark single molecule analysis"""
-        smiles = "CC(C)(C)c1ccc(O)cc1"
-        
-        times = []
-        for _ in range(10):
-            start = time.time()
-            response = client.post("/api/v2/analyze-molecule", 
-                                 json={"smiles": smiles})
-            end = time.time()
-            
-            assert response.status_code == 200
-            times.append(end - start)
-        
-        avg_time = sum(times) / len(times)
-        print(f"Average analysis time: {avg_time:.3f}s")
-        assert avg_time < 2.0  # Should be under 2 seconds
-    
-    def test_concurrent_analysis(self):
-        """Test concurrent analysis performance"""
-        smiles_list = ["CCO", "CC(=O)O", "c1ccccc1", "CCN(CC)CC"]
-        
-        def analyze_molecule(smiles):
-            start = time.time()
-            response = client.post("/api/v2/analyze-molecule", 
-                                 json={"smiles": smiles})
-            end = time.time()
-            return response.status_code, end - start
-        
-        start_total = time.time()
-        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-            futures = [executor.submit(analyze_molecule, smiles) 
-                      for smiles in smiles_list]
-            results = [future.result() for future in futures]
-        end_total = time.time()
-        
-        # All should succeed
-        assert all(status == 200 for status, _ in results)
-        
-        # Should be faster than sequential
-        total_time = end_total - start_total
-        sequential_time = sum(time for _, time in results)
-        print(f"Concurrent time: {total_time:.3f}s vs Sequential: {sequential_time:.3f}s")
-        assert total_time < sequential_time
-    
-    def test_generation_performance(self):
-        """Benchmark molecule generation"""
-        target_props = {"solubility": -2.0, "bioavailability": 70.0}
-        
-        times = []
-        for count in [1, 5, 10]:
-            start = time.time()
-            response = client.post("/api/v2/generate-molecules", 
-                                 json={
-                                     "target_properties": target_props,
-                                     "count": count
-                                 })
-            end = time.time()
-            
-            assert response.status_code == 200
-            times.append((count, end - start))
-        
-        # Time should scale reasonably with count
-        for count, time_taken in times:
-            rate = count / time_taken
-            print(f"Generation rate: {rate:.2f} molecules/second for {count} molecules")
-            assert rate > 0.5  # At least 0.5 molecules per second
-
-class TestLoadTesting:
-    """Load testing scenarios"""
-    
-    def test_rapid_requests(self):
-        """Test handling of rapid successive requests"""
-        smiles = "CCO"
-        success_count = 0
-        
-        for i in range(20):
-            response = client.post("/api/v2/analyze-molecule", 
-                                 json={"smiles": smiles})
-            if response.status_code == 200:
-                success_count += 1
-        
-        # Should handle most requests successfully
-        success_rate = success_count / 20
-        print(f"Success rate: {success_rate:.2%}")
-        assert success_rate > 0.8  # At least 80% success rate
-    
-    def test_memory_usage(self):
-        """Test that memory usage doesn't grow excessively"""
-        import psutil
-        import os
-        
-        process = psutil.Process(os.getpid())
-        initial_memory = process.memory_info().rss
-        
-        # Perform many operations
-        for i in range(50):
-            response = client.post("/api/v2/analyze-molecule", 
-                                 json={"smiles": f"{'C' * (i % 10 + 1)}O"})
-            assert response.status_code in [200, 400]  # Valid or invalid SMILES
-        
-        final_memory = process.memory_info().rss
-        memory_growth = final_memory - initial_memory
-        
-        print(f"Memory growth: {memory_growth / 1024 / 1024:.2f} MB")
-        # Memory growth should be reasonable (less than 100MB)
-        assert memory_growth < 100 * 1024 * 1024
-
-class TestScalability:
-    """Test scalability characteristics"""
-    
-    def test_batch_processing_efficiency(self):
-        """Test efficiency of processing multiple molecules"""
-        molecules = [f"{'C' * i}O" for i in range(1, 11)]
-        
-        # Test sequential processing
-        start_sequential = time.time()
-        for smiles in molecules:
-            response = client.post("/api/v2/analyze-molecule", 
-                                 json={"smiles": smiles})
-            # Don't assert here as some may be invalid
-        end_sequential = time.time()
-        
-        sequential_time = end_sequential - start_sequential
-        print(f"Sequential processing: {sequential_time:.3f}s for {len(molecules)} molecules")
-        
-        # Should process at reasonable rate
-        rate = len(molecules) / sequential_time
-        assert rate > 0.5  # At least 0.5 molecules per second
-
-# Benchmark utilities
-class PerformanceProfiler:
-    """Utility class for performance profiling"""
-    
-    def __init__(self):
-        self.results = {}
-    
-    def profile_endpoint(self, endpoint_func, name, iterations=10):
-        """Profile an endpoint function"""
-        times = []
-        
-        for _ in range(iterations):
-            start = time.time()
-            try:
-                result = endpoint_func()
-                success = True
-            except Exception:
-                success = False
-            end = time.time()
-            
-            times.append({
-                'time': end - start,
-                'success': success
-            })
-        
-        self.results[name] = {
-            'avg_time': sum(t['time'] for t in times) / len(times),
-            'min_time': min(t['time'] for t in times),
-            'max_time': max(t['time'] for t in times),
-            'success_rate': sum(1 for t in times if t['success']) / len(times)
-        }
-        
-        return self.results[name]
-    
-    def print_summary(self):
-        """Print performance summary"""
-        print("\n" + "=" * 60)
-        print("PERFORMANCE SUMMARY")
-        print("=" * 60)
-        
-        for name, stats in self.results.items():
-            print(f"\n{name}:")
-            print(f"  Average Time: {stats['avg_time']:.3f}s")
-            print(f"  Min Time: {stats['min_time']:.3f}s")
-            print(f"  Max Time: {stats['max_time']:.3f}s")
-            print(f"  Success Rate: {stats['success_rate']:.1%}")
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark import AppTargets, Benchmark, compare_results, load_results, run_suite, save_results, summarize
+from load_test import AppServer, parse_mix, run_load
+
+QUICK = Benchmark(warmup=1, min_repeats=3, max_repeats=3, min_time=0)
+PROPERTIES = ("solubility", "toxicity", "bioavailability", "drug_likeness", "binding_affinity")
+
+@pytest.fixture(scope="module")
+def model_dir(tmp_path_factory):
+    """Small ensembles trained once on a few hundred samples, so no test waits for the full startup training"""
+    import src.main as app
+    if not hasattr(app, "ModelArtifactStore"):
+        return None  # the single-file app has no fitted models
+
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.linear_model import Ridge
+
+    directory = str(tmp_path_factory.mktemp("models"))
+    model_configs = {name: {"ensemble": [Ridge(), RandomForestRegressor(n_estimators=10, random_state=42)],
+                            "feature_count": 1024} for name in PROPERTIES}
+    models, scalers = asyncio.run(app.TrainingScheduler(max_workers=1, n_samples=200).train(model_configs))
+    app.ModelArtifactStore(directory).save(app.config.MODEL_VERSION, models, scalers)
+    return directory
+
+@pytest.fixture(scope="module")
+def targets(model_dir):
+    import src.main as app
+    if model_dir is None:
+        yield AppTargets()
+        return
+
+    ai = app.molecular_ai
+    artifact_store, ai.artifact_store = ai.artifact_store, app.ModelArtifactStore(model_dir)
+    if not ai.is_initialized:
+        asyncio.run(ai.initialize())
+    yield AppTargets()
+    ai.artifact_store = artifact_store
+
+@pytest.fixture(scope="module")
+def quick_suite(targets):
+    return run_suite(sizes=(1, 10), single_max=10, benchmark=QUICK, targets=targets, verbose=False)
+
+class TestBenchmarkHarness:
+    """Test the statistics and baseline comparison"""
+
+    def test_summary_statistics(self):
+        """Percentiles, variance and throughput come from the nanosecond samples"""
+        result = summarize([1_000_000, 2_000_000, 3_000_000, 4_000_000, 10_000_000], size=100)
+        assert result["repeats"] == 5
+        assert result["p50_ms"] == pytest.approx(3.0)
+        assert result["mean_ms"] == pytest.approx(4.0)
+        assert result["min_ms"] == pytest.approx(1.0) and result["max_ms"] == pytest.approx(10.0)
+        assert result["variance_ms2"] == pytest.approx(12.5)
+        assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"] <= result["max_ms"]
+        assert result["per_molecule_us"] == pytest.approx(30.0)
+        assert result["molecules_per_second"] == pytest.approx(100 / 0.003)
+
+    def test_warmup_runs_are_not_timed(self):
+        """Warmup calls happen but only the timed repeats are summarized"""
+        calls = []
+        result = Benchmark(warmup=2, min_repeats=4, max_repeats=4, min_time=0).run(lambda: calls.append(1))
+        assert len(calls) == 6
+        assert result["repeats"] == 4
+
+    def test_comparison_flags_regressions(self, tmp_path):
+        """Cases slower than the threshold fail; faster or new cases do not"""
+        baseline = {"results": {"features/100": {"p50_ms": 10.0}, "generate/100": {"p50_ms": 4.0}}}
+        path = tmp_path / "baseline.json"
+        save_results(baseline, str(path))
+
+        current = {"results": {"features/100": {"p50_ms": 13.0}, "generate/100": {"p50_ms": 3.0},
+                               "serialize/100": {"p50_ms": 1.0}}}
+        comparison = {row["case"]: row for row in compare_results(current, load_results(str(path)), threshold=0.25)}
+        assert comparison["features/100"]["regression"]
+        assert comparison["features/100"]["ratio"] == pytest.approx(1.3)
+        assert not comparison["generate/100"]["regression"]
+        assert "serialize/100" not in comparison
+
+class TestBenchmarkSuite:
+    """Run every benchmark case at small sizes"""
+
+    def test_every_case_is_measured(self, quick_suite):
+        """The suite covers extraction, prediction, generation and serialization at each size"""
+        results = quick_suite["results"]
+        for case in ("features", "predict_single", "predict_batch", "generate", "serialize"):
+            for size in (1, 10):
+                result = results[f"{case}/{size}"]
+                assert result["repeats"] == 3
+                assert 0 < result["min_ms"] <= result["p50_ms"] <= result["max_ms"]
+        assert quick_suite["environment"]["app"] in ("advanced", "single-file")
+
+    def test_batch_prediction_beats_single(self, quick_suite):
+        """One batched call is cheaper per molecule than a call per molecule"""
+        results = quick_suite["results"]
+        assert results["predict_batch/10"]["p50_ms"] < results["predict_single/10"]["p50_ms"]
+
+    def test_single_prediction_limit(self, targets):
+        """The per-molecule loop is skipped above single_max"""
+        document = run_suite(sizes=(5,), cases=("predict_single", "predict_batch"), single_max=1,
+                             benchmark=QUICK, targets=targets, verbose=False)
+        assert list(document["results"]) == ["predict_batch/5"]
+
+class TestLoadGenerator:
+    """Drive a live uvicorn instance with the tests/load_test.py client"""
+
+    def test_request_mix_is_normalized(self):
+        """Weights are relative; unknown request types are rejected"""
+        assert parse_mix("analyze=3,stats=1") == {"analyze": 0.75, "stats": 0.25}
+        with pytest.raises(ValueError):
+            parse_mix("analyze=1,delete=1")
+
+    def test_short_run_against_uvicorn(self, model_dir):
+        """Every request type gets real responses over sockets with no errors"""
+        # The worker loads the small ensembles and fails fast rather than training if they are missing
+        env = {"MODEL_DIR": model_dir, "TRAIN_ON_STARTUP": "false"} if model_dir else None
+        server = AppServer(workers=1, env=env)
+        server.start()
+        try:
+            report = asyncio.run(run_load(server.host, server.port, concurrency=4, duration=1.0,
+                                          mix=parse_mix("analyze=2,generate=1,stats=1"), warmup=0.5))
+        finally:
+            server.stop()
+
+        assert report["total"]["requests"] > 0
+        assert report["total"]["error_rate"] == 0.0
+        for name in ("analyze", "generate", "stats"):
+            endpoint = report["endpoints"][name]
+            assert endpoint["requests"] > 0
+            assert endpoint["p50_ms"] <= endpoint["p99_ms"] <= endpoint["max_ms"]
 
 # Run with: pytest tests/test_performance.py -v -s
@@ -0,0 +1,369 @@
+"""
+Tests for the professional platform build of src/main.py
+Batch, streaming, caching and observability endpoints; skipped when src/main.py is the advanced platform
+"""
+
+import pytest
+import numpy as np
+from fastapi.testclient import TestClient
+from src import main
+
+if hasattr(main, "ModelArtifactStore"):
+    pytest.skip("src/main.py is the advanced platform", allow_module_level=True)
+
+client = TestClient(main.app)
+
+class TestBatchAnalysis:
+    """Test vectorized batch analysis"""
+
+    def test_batch_matches_single_predictions(self):
+        """Batch results should agree with single-molecule predictions"""
+        from src.main import molecular_ai
+
+        smiles_list = ["CCO", "CC(=O)O", "c1ccccc1", "CCN(CC)CC"]
+        records = molecular_ai.records_from_batch(molecular_ai.predict_properties_batch(smiles_list))
+
+        for smiles, record in zip(smiles_list, records):
+            single = molecular_ai.predict_properties(smiles)
+            for prop, data in single["predictions"].items():
+                assert record["predictions"][prop]["value"] == pytest.approx(data["value"])
+                assert record["predictions"][prop]["interpretation"] == data["interpretation"]
+                assert record["predictions"][prop]["risk_level"] == data["risk_level"]
+
+    def test_vectorized_thresholds(self):
+        """Vectorized interpretation and risk follow the scalar thresholds"""
+        from src.main import molecular_ai
+
+        values = np.array([0.0, -2.0, -4.0, -7.0])
+        levels = molecular_ai._assess_risk_batch("solubility", values, np.array([0.9, 0.9, 0.9, 0.5]))
+        assert list(levels) == ["LOW", "LOW", "MEDIUM", "UNCERTAIN"]
+        assert molecular_ai._get_interpretation("toxicity", 0.8).startswith("High toxicity")
+
+    def test_batch_endpoint(self):
+        """Batch endpoint returns one record per valid SMILES and reports errors"""
+        response = client.post("/api/analyze/batch",
+                             json={"smiles": ["CCO", "C(", "c1ccccc1"]})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == 2
+        assert [r["index"] for r in data["results"]] == [0, 2]
+        assert data["errors"][0]["index"] == 1
+
+    def test_batch_endpoint_columns(self):
+        """Columnar output keeps one array per property field"""
+        response = client.post("/api/analyze/batch",
+                             json={"smiles": ["CCO", "CC(=O)O"], "format": "columns"})
+        assert response.status_code == 200
+        columns = response.json()["results"]
+        assert len(columns["predictions"]["toxicity"]["value"]) == 2
+
+    def test_batch_endpoint_limits(self):
+        """Empty and oversized batches are rejected"""
+        from src.main import MAX_BATCH_SIZE
+
+        assert client.post("/api/analyze/batch", json={"smiles": []}).status_code == 400
+        response = client.post("/api/analyze/batch",
+                             json={"smiles": ["CCO"] * (MAX_BATCH_SIZE + 1)})
+        assert response.status_code == 413
+
+class TestDeterministicSeeding:
+    """Test that per-SMILES randomness is stable across threads and processes"""
+
+    def test_predictions_stable_across_processes(self):
+        """Different hash seeds must not change predictions"""
+        import os
+        import subprocess
+        import sys
+        from src.main import molecular_ai
+
+        script = ("from src.main import molecular_ai; "
+                  "print(repr(molecular_ai.predict_properties('CC(=O)O')['predictions']['toxicity']['value']))")
+        env = dict(os.environ, PYTHONHASHSEED="12345")
+        output = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True,
+                                text=True, check=True).stdout.strip().splitlines()[-1]
+
+        expected = molecular_ai.predict_properties("CC(=O)O")["predictions"]["toxicity"]["value"]
+        assert float(output) == expected
+
+    def test_features_stable_under_threads(self):
+        """Concurrent feature extraction returns the same vectors as sequential calls"""
+        import concurrent.futures
+        from src.ai_models.model_utils import MolecularFeatureExtractor
+
+        extractor = MolecularFeatureExtractor()
+        smiles_list = ["CCO", "CC(=O)O", "c1ccccc1", "CCN(CC)CC"] * 25
+        expected = [extractor._extract_molecular_features(s) for s in smiles_list]
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(extractor._extract_molecular_features, smiles_list))
+
+        for got, want in zip(results, expected):
+            np.testing.assert_array_equal(got, want)
+
+class TestPredictionCache:
+    """Test the content-addressed prediction cache"""
+
+    def test_repeated_analysis_hits_cache(self):
+        """A repeated SMILES is served from the cache and counted as a hit"""
+        from src.main import prediction_cache
+
+        prediction_cache.clear()
+        hits = prediction_cache.hits
+        first = client.post("/api/analyze", json={"smiles": "CCOC(=O)C"})
+        second = client.post("/api/analyze", json={"smiles": " CCOC(=O)C "})
+        assert first.status_code == second.status_code == 200
+        assert first.json() == second.json()
+        assert prediction_cache.hits == hits + 1
+
+        stats = client.get("/api/stats").json()
+        assert stats["prediction_cache"]["hits"] >= 1
+        assert stats["system_metrics"]["cache_hit_rate"].endswith("%")
+
+    def test_lru_eviction_and_ttl(self):
+        """Least recently used entries are evicted first and stale entries expire"""
+        from src.main import PredictionCache
+
+        now = [0.0]
+        cache = PredictionCache(max_size=2, ttl_seconds=10, clock=lambda: now[0])
+        cache.put("CCO", "v1", {"id": 1})
+        cache.put("CCN", "v1", {"id": 2})
+        assert cache.get("CCO", "v1") == {"id": 1}
+        cache.put("CCC", "v1", {"id": 3})
+        assert cache.get("CCN", "v1") is None
+        assert cache.evictions == 1
+
+        assert cache.get("CCO", "v2") is None
+        now[0] = 11.0
+        assert cache.get("CCO", "v1") is None
+        assert cache.expirations == 1
+
+class TestStreamingAnalysis:
+    """Test the NDJSON streaming analysis endpoint"""
+
+    def test_stream_returns_one_record_per_line(self):
+        """Records come back in input order, with per-line errors and optional names"""
+        import json
+
+        body = "CCO ethanol\n\nC(\nc1ccccc1\n"
+        response = client.post("/api/analyze/stream", content=body.encode())
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert [r["index"] for r in records] == [0, 1, 2]
+        assert records[0]["id"] == "ethanol"
+        assert "predictions" in records[0] and "predictions" in records[2]
+        assert "detail" in records[1]
+
+    def test_stream_chunks_match_batch(self):
+        """Chunked scoring gives the same predictions as the batch endpoint"""
+        import json
+        from src.main import stream_predictions
+
+        smiles_list = ["CCO", "CC(=O)O", "c1ccccc1", "CCN(CC)CC", "CCCC"]
+        chunks = list(stream_predictions(smiles_list, chunk_size=2))
+        assert len(chunks) == 3
+
+        streamed = [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+        batch = client.post("/api/analyze/batch", json={"smiles": smiles_list}).json()["results"]
+        for got, want in zip(streamed, batch):
+            assert got["predictions"] == want["predictions"]
+
+    def test_buffered_upload_matches_incremental(self):
+        """?buffer=true spools the upload first and returns the same records"""
+        import json
+
+        body = "CCO ethanol\nC(\nc1ccccc1\n" * 3
+        incremental = client.post("/api/analyze/stream", content=body.encode())
+        buffered = client.post("/api/analyze/stream?buffer=true", content=body.encode())
+        assert buffered.status_code == incremental.status_code == 200
+
+        records = [[{key: value for key, value in json.loads(line).items() if key != "timestamp"}
+                    for line in response.text.splitlines()] for response in (incremental, buffered)]
+        assert len(records[0]) == 9 and records[0] == records[1]
+
+    @pytest.mark.asyncio
+    async def test_records_are_sent_before_the_upload_ends(self, monkeypatch):
+        """A full chunk is scored and sent while the rest of the upload is still being received"""
+        import asyncio
+
+        monkeypatch.setattr(main, "STREAM_CHUNK_SIZE", 2)
+        parts = [b"CCO\nCC(=O)", b"O\nc1ccccc1\n", b"CCN\n"]
+        events = []
+
+        async def receive():
+            if not parts:
+                await asyncio.sleep(60)  # a connected client with nothing left to send
+            events.append("receive")
+            body = parts.pop(0)
+            return {"type": "http.request", "body": body, "more_body": bool(parts)}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                events.append("body")
+
+        scope = {"type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+                 "method": "POST", "scheme": "http", "path": "/api/analyze/stream", "raw_path": b"/api/analyze/stream",
+                 "query_string": b"", "root_path": "", "headers": [], "server": ("testserver", 80),
+                 "client": ("testclient", 50000)}
+        await asyncio.wait_for(main.app(scope, receive, send), timeout=30)
+        assert events == ["receive", "receive", "body", "receive", "body"]
+
+class TestSmilesParser:
+    """Test the single-pass SMILES parser"""
+
+    def test_atoms_bonds_and_rings(self):
+        """Bracket atoms, two-letter halogens, implicit hydrogens and ring closures"""
+        from src.main import AROMATIC_BOND, parse_smiles
+
+        indole = parse_smiles("c1ccc2[nH]ccc2c1")
+        assert indole.atoms.tolist() == [6, 6, 6, 6, 7, 6, 6, 6, 6]
+        assert indole.hydrogens.tolist() == [1, 1, 1, 0, 1, 1, 1, 0, 1]
+        assert len(indole.bonds) == 10 and set(indole.orders.tolist()) == {AROMATIC_BOND}
+
+        chloro = parse_smiles("CC(Cl)=O")
+        assert chloro.atoms.tolist() == [6, 6, 17, 8]
+        assert chloro.orders.tolist() == [1, 1, 2]
+        assert parse_smiles("[O-][N+](=O)C").charges.tolist() == [-1, 1, 0, 0]
+
+    @pytest.mark.parametrize("smiles", ["C(", "C)", "C()C", "C1CC", "C=", "=C", "C..C", "[Xx]", "C1C1", "CCO🧬"])
+    def test_invalid_smiles(self, smiles):
+        """Malformed strings are rejected with a reason"""
+        from src.main import validate_smiles
+
+        assert validate_smiles(smiles).startswith("Invalid SMILES: ")
+
+    def test_validation_shares_the_parse(self):
+        """Descriptors reuse the graph parsed during validation"""
+        from src.main import molecular_ai, parse_smiles, validate_smiles
+
+        parse_smiles.cache_clear()
+        assert validate_smiles("CCN(CC)C(=O)c1ccccc1") is None
+        molecular_ai.predict_properties("CCN(CC)C(=O)c1ccccc1")
+        info = parse_smiles.cache_info()
+        assert (info.misses, info.hits) == (1, 1)
+
+class TestPageDelivery:
+    """Test precompressed page delivery"""
+
+    def test_pages_are_precompressed_and_revalidated(self):
+        """Pages come back gzip-encoded with a stable ETag, and a matching If-None-Match gets 304"""
+        response = client.get("/platform", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert "max-age=" in response.headers["cache-control"]
+        assert "<html" in response.text
+
+        etag = response.headers["etag"]
+        assert client.get("/platform").headers["etag"] == etag
+        revalidated = client.get("/platform", headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+
+        identity = client.get("/", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in identity.headers
+
+    def test_encoding_negotiation(self):
+        """q-values and wildcards are honoured, brotli is preferred when available"""
+        from src.main import negotiate_encoding
+
+        available = {"identity": b"", "gzip": b"", "br": b""}
+        assert negotiate_encoding("gzip, deflate, br", available) == "br"
+        assert negotiate_encoding("br;q=0, gzip", available) == "gzip"
+        assert negotiate_encoding("*;q=0.5", {"identity": b"", "gzip": b""}) == "gzip"
+        assert negotiate_encoding("gzip;q=0", available) == "identity"
+        assert negotiate_encoding("", available) == "identity"
+
+class TestRequestMetrics:
+    """Test the request metrics middleware and /metrics"""
+
+    def test_metrics_track_requests_by_route(self):
+        """Requests are counted per route template and status, with latency quantiles"""
+        client.get("/health")
+        client.post("/api/analyze", json={})
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+
+        text = response.text
+        assert '# TYPE chemai_http_request_duration_seconds summary' in text
+        assert 'chemai_http_requests_total{method="GET",route="/health",status="200"}' in text
+        assert 'chemai_http_requests_total{method="POST",route="/api/analyze",status="400"}' in text
+        assert 'chemai_http_request_duration_seconds{method="GET",route="/health",quantile="0.99"}' in text
+
+        stats = client.get("/api/stats").json()
+        assert stats["request_metrics"]["requests_total"] >= 3
+        assert "GET /health" in stats["request_metrics"]["endpoints"]
+        assert stats["system_metrics"]["cpu_usage"].endswith("%")
+
+    def test_platform_stats_are_live_counters(self):
+        """Usage numbers come from this worker's counters rather than fixed values"""
+        before = client.get("/api/stats").json()["platform_stats"]
+        generated = client.post("/api/generate", json={"target_properties": {"solubility": -2.0}, "count": 3})
+        client.post("/api/analyze", json={"smiles": "CCCCO"})
+
+        after = client.get("/api/stats").json()["platform_stats"]
+        assert generated.status_code == 200
+        assert after["molecules_generated"] == before["molecules_generated"] + 3
+        assert after["total_analyses"] >= before["total_analyses"]
+        assert after["api_requests"] > before["api_requests"]
+        assert client.get("/health").json()["performance"]["molecules_generated"] == after["molecules_generated"]
+
+    def test_latency_histogram_accuracy(self):
+        """Percentiles stay within the histogram's relative error bound"""
+        from src.main import LatencyHistogram
+
+        histogram = LatencyHistogram(max_seconds=10)
+        latencies = np.random.default_rng(0).lognormal(mean=-5, sigma=1.5, size=20000)
+        for seconds in latencies:
+            histogram.record(seconds)
+
+        assert len(histogram.counts) < 500
+        for q in (0.5, 0.95, 0.99):
+            exact = np.quantile(latencies, q)
+            assert histogram.percentile(q) == pytest.approx(exact, rel=1 / 16)
+        assert histogram.percentile(1.0) == pytest.approx(latencies.max())
+
+class TestPipelineProfiling:
+    """Test per-stage timers and the sampling profiler"""
+
+    def test_timing_header_is_opt_in(self):
+        """Stage timings come back in Server-Timing format only when requested"""
+        from src.main import prediction_cache
+
+        prediction_cache.clear()
+        plain = client.post("/api/analyze", json={"smiles": "CCN(CC)C(=O)C"})
+        assert "x-chemai-timing" not in plain.headers
+
+        prediction_cache.clear()
+        timed = client.post("/api/analyze", json={"smiles": "CCN(CC)C(=O)C"}, headers={"X-ChemAI-Timing": "1"})
+        assert timed.json()["predictions"] == plain.json()["predictions"]
+        stages = dict(entry.split(";dur=") for entry in timed.headers["x-chemai-timing"].split(", "))
+        assert list(stages) == ["validate", "cache", "descriptors", "predict", "interpret", "format"]
+        assert all(float(duration) >= 0 for duration in stages.values())
+
+        for value in ("0", "false", "off", "no", ""):
+            declined = client.post("/api/analyze", json={"smiles": "CCN(CC)C(=O)C"}, headers={"X-ChemAI-Timing": value})
+            assert "x-chemai-timing" not in declined.headers
+        assert "x-chemai-timing" in client.post("/api/analyze", json={"smiles": "CCN(CC)C(=O)C"},
+                                                 headers={"X-ChemAI-Timing": " True"}).headers
+
+        summary = client.get("/api/stats").json()["pipeline_stages"]
+        assert summary["predict"]["count"] >= 2
+        assert 0 < summary["descriptors"]["share"] < 1
+
+    def test_sampling_profiler_toggle(self):
+        """The profiler can be switched on and off at runtime and only counts app stacks"""
+        import time
+        from src.main import sampling_profiler
+
+        report = client.post("/api/profiler", json={"enabled": True, "reset": True}).json()
+        assert report["enabled"] and report["samples"] == 0
+        deadline = time.time() + 5
+        while sampling_profiler.samples == 0 and time.time() < deadline:
+            client.post("/api/analyze/batch", json={"smiles": ["CCO", "c1ccccc1", "CC(=O)O"] * 200})
+
+        report = client.post("/api/profiler", json={"enabled": False}).json()
+        assert not report["enabled"]
+        assert report["samples"] > 0
+        assert any("main.py" in entry["function"] for entry in report["top_inclusive"])
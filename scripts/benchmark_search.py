@@ -0,0 +1,87 @@
+"""
+Compound search benchmark for the ChemAI Discovery API
+Substructure prefilter rejection rate and latency, plus similarity search, on a synthetic library
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+from index import (FingerprintIndex, match_substructure, parse_smiles_graph, search_substructure,
+                   smiles_fingerprint)
+
+RINGS = ["c1ccccc1", "c1ccncc1", "C1CCNCC1", "C1CCCCC1", "c1ccc2[nH]ccc2c1", "C1CCOC1", "c1ccsc1", "c1cncnc1"]
+LINKERS = ["", "C", "CC", "C(=O)N", "O", "N", "CO", "S(=O)(=O)N", "C=C"]
+SUBSTITUENTS = ["", "C", "O", "N", "F", "Cl", "Br", "C(=O)O", "C#N", "OC", "N(C)C", "C(F)(F)F", "[N+](=O)[O-]"]
+
+QUERIES = ["c1ccccc1", "C(=O)O", "c1ccncc1", "C#N", "S(=O)(=O)N", "c1ccc2[nH]ccc2c1",
+           "C(F)(F)F", "c1ccsc1C", "NC(=O)c1ccccc1", "C1CCNCC1C(=O)N"]
+
+def make_library(n_molecules: int, seed: int = 0):
+    """Synthetic drug-like SMILES: 1-3 ring systems joined by linkers, with substituents"""
+    rng = np.random.default_rng(seed)
+    library = []
+    for _ in range(n_molecules):
+        parts = []
+        for position in range(rng.integers(1, 4)):
+            if position:
+                parts.append(LINKERS[rng.integers(len(LINKERS))])
+            parts.append(RINGS[rng.integers(len(RINGS))] + SUBSTITUENTS[rng.integers(len(SUBSTITUENTS))])
+        library.append(SUBSTITUENTS[rng.integers(1, len(SUBSTITUENTS))] + "".join(parts))
+    return library
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark substructure and similarity search")
+    parser.add_argument("--compounds", type=int, default=100000, help="Synthetic library size")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per query")
+    parser.add_argument("--limit", type=int, default=1000, help="Maximum matches per substructure query")
+    parser.add_argument("--skip-verify", action="store_true", help="Skip the brute-force false-negative check")
+    args = parser.parse_args()
+    
+    library = make_library(args.compounds)
+    print(f"🧪 Fingerprinting {len(library):,} synthetic compounds...")
+    start = time.perf_counter()
+    index = FingerprintIndex()
+    index.add_fingerprints([{"id": f"cmpd_{i}", "smiles": smiles} for i, smiles in enumerate(library)],
+                           np.vstack([smiles_fingerprint(smiles) for smiles in library]))
+    index.screen(smiles_fingerprint("C"))  # build the sorted arrays outside the timings
+    print(f"   indexed in {time.perf_counter() - start:.1f}s")
+    
+    graphs = None if args.skip_verify else [parse_smiles_graph(smiles) for smiles in library]
+    
+    print(f"\n⚡ Substructure search (limit={args.limit}, best of {args.repeats})")
+    print(f"  {'query':<20} {'candidates':>10} {'rejected':>9} {'matches':>8} {'screen ms':>10} {'total ms':>9} {'missed':>7}")
+    for query in QUERIES:
+        query_fp = smiles_fingerprint(query)
+        screen_time = min(_timed(lambda: index.screen(query_fp)) for _ in range(args.repeats))
+        total_time = min(_timed(lambda: search_substructure(index, query, args.limit)) for _ in range(args.repeats))
+        matches, candidates = search_substructure(index, query, len(library))
+        
+        missed = "-"
+        if graphs is not None:
+            query_graph = parse_smiles_graph(query)
+            expected = sum(match_substructure(query_graph, graph) for graph in graphs)
+            missed = expected - len(matches)
+        
+        print(f"  {query:<20} {candidates:>10,} {1 - candidates / len(library):>8.1%} {len(matches):>8,} "
+              f"{screen_time * 1000:>10.2f} {total_time * 1000:>9.1f} {missed:>7}")
+    
+    print(f"\n🔎 Similarity search (k=50, best of {args.repeats})")
+    for query in QUERIES[:4]:
+        query_fp = smiles_fingerprint(query)
+        elapsed = min(_timed(lambda: index.search(query_fp, 50)) for _ in range(args.repeats))
+        _, scores, scored = index.search(query_fp, 50)
+        print(f"  {query:<20} {elapsed * 1000:>8.2f}ms  scored {scored:,}  top {scores[0]:.3f}")
+
+def _timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    main()
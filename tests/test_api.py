@@ -0,0 +1,367 @@
+"""
+Test Suite for the ChemAI Discovery Vercel API
+Result stores, analysis jobs, compound listing and compound search
+"""
+
+import os
+import sys
+import time
+import pytest
+import numpy as np
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import api.index
+from api.index import (app, CompoundCatalog, DrugCandidate, FingerprintIndex, JobManager, JobRequest,
+                       MemoryResultStore, MolecularStructure, ResultStore, SQLiteResultStore, decode_cursor,
+                       drug_database, encode_cursor, job_manager, match_substructure, parse_smiles_graph,
+                       popcount_rows, search_substructure, smiles_fingerprint)
+
+client = TestClient(app)
+
+def wait_for_job(manager, job_id, timeout=10.0):
+    """Poll a job until it leaves the queue"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job is not None and job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+class TestResultStores:
+    """Test retention and eviction in the memory and SQLite result stores"""
+
+    def job_records(self, job_id, analyses, created_at):
+        records = [{"id": f"{job_id}_a{i}", "kind": "analysis", "created_at": created_at, "payload": {"i": i},
+                    "job_id": job_id} for i in range(analyses)]
+        records.append({"id": job_id, "kind": "job", "created_at": created_at,
+                        "payload": {"analysis_ids": [record["id"] for record in records]}})
+        return records
+
+    def test_memory_store_keeps_a_full_job_with_its_analyses(self):
+        """A job larger than the analysis budget keeps every analysis; standalone analyses do not evict it"""
+        store = MemoryResultStore(max_entries=3, max_jobs=2)
+        store.put_many(self.job_records("job_big", 10, time.time()))
+        for i in range(5):
+            store.put(f"analysis_{i}", "analysis", {"i": i})
+
+        assert len(store.get_many([f"job_big_a{i}" for i in range(10)])) == 10
+        assert store.get("job_big") is not None
+        assert store.get("analysis_0") is None and store.get("analysis_4") == {"i": 4}
+
+    def test_memory_store_evicts_jobs_with_their_analyses(self):
+        """The least recently used job goes, together with its analyses"""
+        store = MemoryResultStore(max_entries=3, max_jobs=2)
+        for job_id in ("job_1", "job_2"):
+            store.put_many(self.job_records(job_id, 2, time.time()))
+        store.get("job_1")  # job_2 is now least recently used
+        store.put_many(self.job_records("job_3", 2, time.time()))
+
+        assert store.get("job_2") is None and store.get_many(["job_2_a0", "job_2_a1"]) == {}
+        assert store.get("job_1") is not None and len(store.get_many(["job_1_a0", "job_1_a1"])) == 2
+        assert store.stats()["jobs"] == 2 and store.stats()["evictions"] == 1
+
+    def test_memory_store_expires_old_records(self):
+        """Records older than the retention window are not served, and an expired job drops its analyses"""
+        store = MemoryResultStore(retention_seconds=60)
+        store.put_many(self.job_records("job_old", 2, time.time() - 120))
+        store.put_many(self.job_records("job_new", 2, time.time()))
+
+        assert store.get("job_old") is None
+        assert store.stats()["entries"] == 3
+        assert store.get("job_new") is not None
+
+    def test_store_backends_must_implement_put_and_get(self):
+        class WriteOnlyStore(ResultStore):
+            def put_many(self, records):
+                pass
+
+        with pytest.raises(TypeError):
+            WriteOnlyStore()
+
+    def test_sqlite_store_survives_restart(self, tmp_path):
+        """Committed records are read back by a new store on the same file; expired ones are not"""
+        path = str(tmp_path / "results.db")
+        store = SQLiteResultStore(path, retention_seconds=60)
+        store.put_many(self.job_records("job_1", 3, time.time()))
+        store.put("analysis_old", "analysis", {"old": True})
+        store.put_many([{"id": "analysis_expired", "kind": "analysis", "created_at": time.time() - 120,
+                         "payload": {}}])
+        assert store.get("job_1") is not None  # readable before the writer commits
+        store.flush()
+        store.close()
+
+        reopened = SQLiteResultStore(path, retention_seconds=60)
+        try:
+            assert len(reopened.get_many(["job_1", "job_1_a0", "job_1_a1", "job_1_a2"])) == 4
+            assert reopened.get("analysis_old") == {"old": True}
+            assert reopened.get("analysis_expired") is None
+        finally:
+            reopened.close()
+
+class TestJobs:
+    """Test the analysis job queue and polling"""
+
+    def test_submit_and_poll_job(self):
+        """A submitted job is pollable until it completes with all its analyses"""
+        response = client.post("/api/jobs", json={"compounds": ["CCO" * 2, "c1ccccc1", "CC(=O)O"]})
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        wait_for_job(job_manager, job_id)
+        response = client.get(f"/api/jobs/{job_id}")
+        assert response.status_code == 200
+        job = response.json()
+        assert job["status"] == "completed" and job["progress"] == 3
+        assert [analysis["analysis_id"] for analysis in job["result"]["analyses"]] == job["result"]["analysis_ids"]
+
+        analysis_id = job["result"]["analysis_ids"][0]
+        assert client.get(f"/api/analyses/{analysis_id}").json()["analysis_id"] == analysis_id
+
+    def test_statistics_count_real_analyses(self):
+        """Usage statistics are this worker's counters, not fixed numbers"""
+        before = client.get("/api/statistics").json()["platform_stats"]["total_compounds_analyzed"]
+        assert client.post("/api/analyze", json={"compound_smiles": "CC(=O)O"}).status_code == 200
+        job_id = client.post("/api/jobs", json={"compounds": ["CCO", "c1ccccc1"]}).json()["job_id"]
+        wait_for_job(job_manager, job_id)
+
+        stats = client.get("/api/statistics").json()
+        assert stats["platform_stats"]["total_compounds_analyzed"] == before + 3
+        assert stats["job_queue"]["compounds_analyzed"] == before + 3
+        assert client.get("/api/status").json()["performance"]["compounds_analyzed"] == before + 3
+        assert client.get("/health").json()["uptime_seconds"] >= 0
+
+    def test_unknown_job_is_404(self):
+        assert client.get("/api/jobs/job_missing").status_code == 404
+
+    def test_job_is_never_missing_while_finishing(self, monkeypatch):
+        """A poll just before the finished record is stored still sees the job"""
+        store = MemoryResultStore()
+        manager = JobManager(store, workers=1)
+        seen = []
+        put_many = store.put_many
+
+        def put_many_after_poll(records):
+            if records[-1]["kind"] == "job" and records[-1]["payload"]["status"] == "completed":
+                seen.append(manager.get(records[-1]["id"]))
+            put_many(records)
+
+        monkeypatch.setattr(store, "put_many", put_many_after_poll)
+        job = manager.submit(JobRequest(compounds=["c1ccccc1"]))
+        assert wait_for_job(manager, job["job_id"])["status"] == "completed"
+        assert seen and seen[0] is not None
+
+    def test_queued_job_is_visible_to_other_workers(self, tmp_path):
+        """With a shared SQLite store, a worker process that did not run the job can poll it"""
+        path = str(tmp_path / "jobs.db")
+        store = SQLiteResultStore(path)
+        manager = JobManager(store, workers=1)
+        other = JobManager(SQLiteResultStore(path), workers=1)
+        try:
+            manager.executor.submit(time.sleep, 0.3)  # hold the only worker so the job stays queued
+            job = manager.submit(JobRequest(compounds=["c1ccccc1", "CC(=O)O"]))
+            store.flush()
+            assert other.get(job["job_id"])["status"] == "queued"
+
+            wait_for_job(manager, job["job_id"])
+            store.flush()
+            finished = other.get(job["job_id"])
+            assert finished["status"] == "completed" and len(finished["result"]["analyses"]) == 2
+        finally:
+            store.close()
+            other.store.close()
+
+    def test_full_queue_returns_503(self):
+        manager = JobManager(MemoryResultStore(), workers=1, max_pending=0)
+        with pytest.raises(Exception) as error:
+            manager.submit(JobRequest(compounds=["c1ccccc1"]))
+        assert error.value.status_code == 503 and error.value.headers["Retry-After"] == "5"
+
+class TestCompoundListing:
+    """Test cursor pagination, field projection and ETag revalidation of /api/compounds"""
+
+    def candidate(self, suffix, smiles="c1ccncc1"):
+        return DrugCandidate(id=f"drug_{suffix}", name=f"Compound-{suffix}", efficacy_score=80.0, toxicity_score=10.0,
+                             target_protein="ACE2", status="Lead Optimization",
+                             structure=MolecularStructure(smiles=smiles, name="Pyridine", molecular_weight=79.1,
+                                                          formula="C5H5N"))
+
+    def test_cursor_round_trip(self):
+        for offset in (0, 1, 99, 123456):
+            assert decode_cursor(encode_cursor(offset)) == offset
+
+    @pytest.mark.parametrize("cursor", ["!!!", "eDox", "bzotMQ", "bzph", "bw"])  # bad base64, x:1, o:-1, o:a, o
+    def test_invalid_cursor_is_400(self, cursor):
+        response = client.get("/api/compounds", params={"cursor": cursor})
+        assert response.status_code == 400 and response.json()["detail"] == "Invalid cursor"
+
+    def test_pages_follow_next_cursor(self):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            data = client.get("/api/compounds", params=params).json()
+            seen.extend(row["id"] for row in data["compounds"])
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == [candidate.id for candidate in drug_database]
+
+    def test_fields_projection(self):
+        data = client.get("/api/compounds", params={"fields": "id, structure.smiles,efficacy_score"}).json()
+        assert data["compounds"][0] == {"id": drug_database[0].id, "efficacy_score": drug_database[0].efficacy_score,
+                                        "structure": {"smiles": drug_database[0].structure.smiles}}
+        response = client.get("/api/compounds", params={"fields": "id,price"})
+        assert response.status_code == 400 and "price" in response.json()["detail"]
+
+    def test_if_none_match_returns_304(self):
+        response = client.get("/api/compounds", params={"limit": 2})
+        etag = response.headers["ETag"]
+        revalidated = client.get("/api/compounds", params={"limit": 2}, headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304 and revalidated.headers["ETag"] == etag and not revalidated.content
+        listed = client.get("/api/compounds", params={"limit": 2}, headers={"If-None-Match": f'"other", {etag}'})
+        assert listed.status_code == 304
+        other = client.get("/api/compounds", params={"limit": 1}, headers={"If-None-Match": etag})
+        assert other.status_code == 200 and other.headers["ETag"] != etag
+
+    def test_add_changes_etag_and_indexes_candidate(self, monkeypatch):
+        """An added compound invalidates cached listings and is searchable right away"""
+        index = FingerprintIndex()
+        catalog = CompoundCatalog(list(drug_database), index)
+        monkeypatch.setattr(api.index, "compound_catalog", catalog)
+        monkeypatch.setattr(api.index, "compound_index", index)
+        etag = client.get("/api/compounds").headers["ETag"]
+
+        catalog.add(self.candidate("new"))
+        response = client.get("/api/compounds", headers={"If-None-Match": etag})
+        assert response.status_code == 200 and response.json()["total_compounds"] == len(drug_database) + 1
+        assert response.json()["revision"] == 2
+        found = client.get("/api/compounds/search", params={"substructure": "c1ccncc1"}).json()
+        assert [record["id"] for record in found["results"]] == ["drug_new"]
+
+        with pytest.raises(ValueError):
+            catalog.add(self.candidate("bad", smiles="C1CC"))
+        assert len(catalog) == len(index) == len(drug_database) + 1
+
+class TestSmilesParser:
+    """Test that the API's graph parser accepts exactly what the shared model_utils parser accepts"""
+
+    CORPUS = ["CCO", "c1ccccc1", "CC(=O)Oc1ccccc1C(=O)O", "c1ccc2[nH]ccc2c1", "[NH4+].[Cl-]", "C1CC1.CC",
+              "CC(Cl)=O", "[O-][N+](=O)C", "C%10CC%10", "C=1CC1", "[se]1cccc1", "*C", "C/C=C/C",
+              "C(", "C)", "C()C", "C((C))O", "(C)C", "C..C", ".C", "C.", "C1CC", "C1C1", "C=", "=C", "C(=)C",
+              "C1CC=1", "C=1CC#1", "C12CC12", "[Xx]", "[C", "C[", "CCO🧬", "", "C(C)(C", "C1.C1"]
+
+    def test_acceptance_matches_shared_parser(self):
+        """Each string is accepted or rejected by both parsers, and accepted ones give the same graph size"""
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ChemAI-Discovery-Advanced", "src"))
+        shared = pytest.importorskip("ai_models.model_utils")
+
+        for smiles in self.CORPUS:
+            try:
+                graph = shared.parse_smiles(smiles)
+            except ValueError:
+                with pytest.raises(ValueError):
+                    parse_smiles_graph(smiles)
+                continue
+            atoms, neighbors = parse_smiles_graph(smiles)
+            assert len(atoms) == graph.n_atoms, smiles
+            assert sum(map(len, neighbors.values())) == 2 * len(graph.bonds), smiles
+
+    @pytest.mark.parametrize("smiles,status", [("CCO", 200), ("c1ccccc1", 200), ("C((C))O", 400), ("C..C", 400),
+                                               ("C1CC", 400), ("", 400)])
+    def test_analyze_validates_with_the_parser(self, smiles, status):
+        response = client.post("/api/analyze", json={"compound_smiles": smiles})
+        assert response.status_code == status
+        if status == 400:
+            assert response.json()["detail"].startswith(("Invalid SMILES", "SMILES string required"))
+
+    def test_job_rejects_any_invalid_compound(self):
+        response = client.post("/api/jobs", json={"compounds": ["CCO", "C((C))O"]})
+        assert response.status_code == 400
+        assert "'C((C))O'" in response.json()["detail"]
+
+class TestFingerprintIndex:
+    """Test Tanimoto search against brute force"""
+
+    def random_fingerprints(self, rng, rows, n_bits):
+        density = rng.uniform(0.01, 0.3, size=(rows, 1))  # spread bit counts over many buckets
+        bits = rng.random((rows, n_bits)) < density
+        return np.packbits(bits, axis=1, bitorder="little").view(np.uint64)
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_top_k_matches_brute_force(self, seed):
+        """Pruned search returns the same top-k scores as scoring every row"""
+        rng = np.random.default_rng(seed)
+        n_bits = 256
+        fingerprints = self.random_fingerprints(rng, 3000, n_bits)
+        index = FingerprintIndex(n_bits=n_bits, chunk_rows=64)
+        for start in range(0, len(fingerprints), 1000):  # several pending blocks to merge
+            index.add_fingerprints([{"id": i} for i in range(start, start + 1000)], fingerprints[start:start + 1000])
+
+        for query in self.random_fingerprints(rng, 10, n_bits):
+            common = popcount_rows(fingerprints & query)
+            expected = common / (popcount_rows(query) + popcount_rows(fingerprints) - common)
+            for k, threshold in ((1, 0.0), (10, 0.0), (25, 0.2)):
+                records, scores, scanned = index.search(query, k=k, threshold=threshold)
+                top = np.sort(expected[expected >= threshold])[::-1][:k]
+                assert np.allclose(scores, top)
+                assert np.allclose([expected[record["id"]] for record in records], scores)
+                assert scanned <= len(fingerprints)
+
+class TestSubstructureSearch:
+    """Test subgraph matching, the fingerprint prefilter and result truncation"""
+
+    LIBRARY = ["Cc1ccccc1", "c1ccncc1", "CCO", "CC(=O)O", "C1CCCCC1", "CCCCCC", "OCc1ccncc1", "c1ccc2ccccc2c1",
+               "CC(=O)Nc1ccc(O)cc1", "CCN(CC)CC", "O=C(O)c1ccccc1O", "ClCCl"]
+
+    @pytest.mark.parametrize("query, target, expected", [
+        ("c1ccccc1", "Cc1ccccc1", True),
+        ("c1ccncc1", "c1ccccc1", False),
+        ("OCC", "CCCO", True),
+        ("C=O", "CCO", False),
+        ("C=O", "CC(=O)O", True),
+        ("CCCCCC", "C1CCCCC1", True),
+        ("C1CCCCC1", "CCCCCC", False),
+        ("c1ccccc1", "C1CCCCC1", False),
+        ("CC(C)C", "CCN(CC)CC", False),
+        ("NC(C)=O", "CC(=O)Nc1ccc(O)cc1", True),
+        ("c1ccc2ccccc2c1", "c1ccccc1", False),
+    ])
+    def test_match_substructure(self, query, target, expected):
+        assert match_substructure(parse_smiles_graph(query), parse_smiles_graph(target)) is expected
+
+    def build_index(self, smiles):
+        index = FingerprintIndex()
+        for i, molecule in enumerate(smiles):
+            index.add({"id": i, "smiles": molecule}, molecule)
+        return index
+
+    @pytest.mark.parametrize("query", ["c1ccccc1", "c1ccncc1", "C=O", "CCO", "CN", "CCCC"])
+    def test_screen_keeps_every_match(self, query):
+        """The prefilter returns exactly the bit supersets, which include every true match"""
+        index = self.build_index(self.LIBRARY)
+        fingerprint = smiles_fingerprint(query)
+        candidates = set(index.screen(fingerprint).tolist())
+
+        supersets = {i for i, molecule in enumerate(self.LIBRARY)
+                     if np.array_equal(smiles_fingerprint(molecule) & fingerprint, fingerprint)}
+        matches = {i for i, molecule in enumerate(self.LIBRARY)
+                   if match_substructure(parse_smiles_graph(query), parse_smiles_graph(molecule))}
+        assert candidates == supersets
+        assert matches <= candidates
+
+    def test_truncated_only_when_more_matches_exist(self):
+        index = self.build_index(self.LIBRARY)
+        matches, _, truncated = search_substructure(index, "c1ccccc1", limit=4)
+        assert len(matches) == 4 and not truncated  # Cc1ccccc1, naphthalene, the paracetamol and salicylic rings
+        matches, _, truncated = search_substructure(index, "c1ccccc1", limit=3)
+        assert len(matches) == 3 and truncated
+
+    def test_search_endpoint(self):
+        """Every seeded candidate has a carbonyl; only aspirin has a carboxyl"""
+        response = client.get("/api/compounds/search", params={"substructure": "C=O", "limit": 1})
+        assert response.status_code == 200
+        assert (response.json()["count"], response.json()["truncated"]) == (1, True)
+        response = client.get("/api/compounds/search", params={"substructure": "OC=O", "limit": 1})
+        assert (response.json()["count"], response.json()["truncated"]) == (1, False)
+        assert client.get("/api/compounds/search", params={"substructure": "C1CC"}).status_code == 400